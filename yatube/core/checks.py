@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+from .locks import is_shared_cache
+
+
+@register(deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """Сессии с отложенной записью, популярное, граф подписок и
+    ограничения частоты рассчитаны на кеш, общий для всех воркеров."""
+    if is_shared_cache():
+        return []
+    return [Warning(
+        'Кеш default не общий для процессов.',
+        hint=(
+            'С несколькими воркерами популярное и лимиты частоты у каждого '
+            'процесса свои, а сессии {}, пользователи, подписки и счётчики '
+            'уведомлений читаются из базы при каждом запросе. '
+            'Настройте Memcached или Redis.'.format(
+                settings.SESSION_ENGINE
+            )
+        ),
+        id='core.W001',
+    )]
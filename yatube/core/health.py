@@ -0,0 +1,109 @@
+"""
+Проверки готовности приложения для балансировщика.
+
+Каждая проверка выполняется в своём потоке с таймаутом
+HEALTH_CHECK_TIMEOUT, результат с задержками в миллисекундах хранится в
+памяти процесса HEALTH_CACHE_TIME секунд, чтобы частые пробы не
+нагружали базу и хранилище.
+"""
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, wait
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+
+
+def check_database():
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+    finally:
+        connection.close()
+
+
+def check_cache():
+    key = f'health:{uuid.uuid4().hex}'
+    cache.set(key, 'ok', 10)
+    value = cache.get(key)
+    cache.delete(key)
+    if value != 'ok':
+        raise RuntimeError('значение не прочитано из кеша')
+
+
+def check_media():
+    name = default_storage.save(
+        f'health/{uuid.uuid4().hex}.txt', ContentFile(b'ok')
+    )
+    default_storage.delete(name)
+
+
+def check_migrations():
+    try:
+        executor = MigrationExecutor(connection)
+        plan = executor.migration_plan(
+            executor.loader.graph.leaf_nodes()
+        )
+    finally:
+        connection.close()
+    if plan:
+        raise RuntimeError(f'не применено миграций: {len(plan)}')
+
+
+CHECKS = {
+    'database': check_database,
+    'cache': check_cache,
+    'media': check_media,
+    'migrations': check_migrations,
+}
+
+_lock = threading.Lock()
+_cached = None
+
+
+def _timed(check):
+    started = time.monotonic()
+    check()
+    return (time.monotonic() - started) * 1000
+
+
+def run_checks():
+    """Запускает все проверки параллельно и возвращает (ok, отчёт)."""
+    timeout = settings.HEALTH_CHECK_TIMEOUT
+    executor = ThreadPoolExecutor(max_workers=len(CHECKS))
+    started = time.monotonic()
+    futures = {
+        name: executor.submit(_timed, check)
+        for name, check in CHECKS.items()
+    }
+    wait(futures.values(), timeout=timeout)
+    executor.shutdown(wait=False)
+    report = {}
+    for name, future in futures.items():
+        remaining = max(timeout - (time.monotonic() - started), 0)
+        try:
+            latency = future.result(timeout=remaining)
+        except TimeoutError:
+            report[name] = {'ok': False, 'error': 'timeout'}
+        except Exception as error:
+            report[name] = {'ok': False, 'error': str(error)}
+        else:
+            report[name] = {'ok': True, 'latency_ms': round(latency, 2)}
+    return all(result['ok'] for result in report.values()), report
+
+
+def readiness():
+    """Возвращает результат run_checks(), не чаще раза в HEALTH_CACHE_TIME."""
+    global _cached
+    with _lock:
+        if _cached is None or _cached[0] < time.monotonic():
+            _cached = (
+                time.monotonic() + settings.HEALTH_CACHE_TIME, run_checks()
+            )
+        return _cached[1]
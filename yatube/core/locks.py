@@ -0,0 +1,46 @@
+"""
+Короткие блокировки в кеше для чтения-изменения-записи общих значений.
+
+Блокировка — ключ, занятый атомарным cache.add, поэтому она работает
+между процессами только с общим для них кешем (Memcached, Redis).
+LocMemCache живёт внутри процесса; см. проверку core.W001.
+"""
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+
+LOCK_KEY = 'lock:{}'
+
+
+def is_shared_cache(alias='default'):
+    """True, если кеш alias виден всем процессам сайта."""
+    return not isinstance(caches[alias], (LocMemCache, DummyCache))
+
+
+@contextmanager
+def cache_lock(name, timeout=5, attempts=5, wait=0.01):
+    """
+    Занимает блокировку name не дольше чем на timeout секунд.
+
+    Отдаёт True, если блокировку удалось занять за attempts попыток,
+    иначе False: вызывающий код сам решает, пропустить ли обновление.
+    """
+    key = LOCK_KEY.format(name)
+    token = uuid.uuid4().hex
+    acquired = False
+    for attempt in range(attempts):
+        if cache.add(key, token, timeout):
+            acquired = True
+            break
+        if attempt + 1 < attempts:
+            time.sleep(wait)
+    try:
+        yield acquired
+    finally:
+        if acquired and cache.get(key) == token:
+            cache.delete(key)
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from core import startup
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет запуск воркера: время импорта модулей и пакетов и '
+        'стоимость AppConfig.ready() каждого приложения.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top', type=int, default=20,
+            help='Сколько самых медленных модулей и пакетов показать.',
+        )
+
+    def handle(self, *args, **options):
+        measured, modules = startup.profile()
+        top = options['top']
+        self.stdout.write(
+            f'Запуск приложения: {measured["total_ms"]:.1f} мс, '
+            f'импорт: {sum(own for _, own, _ in modules) / 1000:.1f} мс'
+        )
+        self.stdout.write('\nAppConfig.ready():')
+        for label, spent in sorted(
+            measured['ready_ms'].items(), key=lambda item: -item[1]
+        ):
+            self.stdout.write(f'{spent:9.2f} мс  {label}')
+        self.stdout.write('\nПакеты (собственное время импорта):')
+        for package, own in startup.group_by_package(modules)[:top]:
+            self.stdout.write(f'{own / 1000:9.2f} мс  {package}')
+        self.stdout.write('\nМодули (вместе с зависимостями):')
+        for module, _, cumulative in sorted(
+            modules, key=lambda item: -item[2]
+        )[:top]:
+            self.stdout.write(f'{cumulative / 1000:9.2f} мс  {module}')
+        if measured['loaded']:
+            self.stdout.write(self.style.WARNING(
+                '\nПри запуске загружены тяжёлые модули: '
+                + ', '.join(measured['loaded'])
+            ))
@@ -0,0 +1,79 @@
+import multiprocessing
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from core import tasks
+
+
+def work(poll_interval, burst, stop):
+    """
+    Цикл процесса-обработчика.
+
+    SIGTERM лишь выставляет stop: текущая задача дорабатывает, и процесс
+    выходит, не оставляя её в статусе «выполняется». Раз в
+    TASKS_MAINTENANCE_INTERVAL секунд процесс возвращает в очередь
+    зависшие задачи и удаляет старые выполненные.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda *args: stop.set())
+    next_maintenance = 0
+    while not stop.is_set():
+        close_old_connections()
+        if time.monotonic() >= next_maintenance:
+            tasks.maintain()
+            next_maintenance = (
+                time.monotonic() + settings.TASKS_MAINTENANCE_INTERVAL
+            )
+        if tasks.run_pending(limit=1):
+            continue
+        if burst:
+            break
+        stop.wait(poll_interval)
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Запускает пул процессов, выполняющих фоновые задачи.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=settings.TASKS_WORKERS,
+            help='Количество процессов-обработчиков.',
+        )
+        parser.add_argument(
+            '--poll-interval', type=float,
+            default=settings.TASKS_POLL_INTERVAL,
+            help='Пауза между опросами пустой очереди, в секундах.',
+        )
+        parser.add_argument(
+            '--burst', action='store_true',
+            help='Выполнить накопившиеся задачи и завершиться.',
+        )
+
+    def handle(self, *args, **options):
+        requeued = tasks.requeue_stale()
+        if requeued:
+            self.stdout.write(f'Возвращено в очередь задач: {requeued}')
+        connections.close_all()
+        stop = multiprocessing.Event()
+        signal.signal(signal.SIGTERM, lambda *args: stop.set())
+        workers = [
+            multiprocessing.Process(
+                target=work,
+                args=(options['poll_interval'], options['burst'], stop),
+            )
+            for _ in range(options['processes'])
+        ]
+        for worker in workers:
+            worker.start()
+        try:
+            while any(worker.is_alive() for worker in workers):
+                time.sleep(0.5)
+        except KeyboardInterrupt:
+            stop.set()
+        for worker in workers:
+            worker.join()
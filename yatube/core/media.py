@@ -0,0 +1,61 @@
+"""Помощники для отдачи файлов из MEDIA_ROOT приложением."""
+import re
+
+
+re_range = re.compile(r'^bytes=(?P<start>\d*)-(?P<end>\d*)$')
+
+
+class Unsatisfiable(Exception):
+    """Запрошенный диапазон целиком за пределами файла."""
+
+
+def parse_range(header, size):
+    """
+    Разбирает заголовок Range с одним диапазоном байт.
+
+    Возвращает (start, end) включительно, None для отсутствующего,
+    составного или некорректного заголовка (тогда отдаётся весь файл)
+    и бросает Unsatisfiable, если диапазон не пересекается с файлом.
+    """
+    match = re_range.match((header or '').replace(' ', ''))
+    if match is None:
+        return None
+    start, end = match.group('start'), match.group('end')
+    if not start:
+        if not end:
+            return None
+        length = int(end)
+        if length == 0:
+            raise Unsatisfiable
+        return max(size - length, 0), size - 1
+    start = int(start)
+    if end and int(end) < start:
+        return None
+    if start >= size:
+        raise Unsatisfiable
+    end = int(end) if end else size - 1
+    return start, min(end, size - 1)
+
+
+class RangeFile:
+    """
+    Читает из открытого файла не больше length байт начиная с offset.
+
+    Намеренно не предоставляет fileno(), чтобы wsgi.file_wrapper сервера
+    не отправил файл целиком через sendfile.
+    """
+
+    def __init__(self, file, offset, length):
+        self.file = file
+        self.file.seek(offset)
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
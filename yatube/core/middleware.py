@@ -0,0 +1,283 @@
+import math
+import re
+import time
+
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.shortcuts import render
+from django.utils.cache import patch_vary_headers
+from django.utils.crypto import constant_time_compare
+from django.utils.decorators import decorator_from_middleware
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.functional import SimpleLazyObject
+from django.utils.text import compress_sequence, compress_string
+
+from .locks import is_shared_cache
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+MIN_COMPRESS_LENGTH = 200
+INCOMPRESSIBLE_TYPES = ('image/', 'video/', 'audio/')
+BROTLI_QUALITY = 5
+
+re_accept_encoding = re.compile(
+    r'(?P<coding>[\w*-]+)\s*(?:;\s*q\s*=\s*(?P<q>[\d.]+))?'
+)
+
+
+def _compress_brotli(content):
+    return brotli.compress(content, quality=BROTLI_QUALITY)
+
+
+COMPRESSORS = {'gzip': compress_string}
+if brotli is not None:
+    COMPRESSORS['br'] = _compress_brotli
+
+
+def negotiate_encoding(accept_encoding):
+    """Выбирает лучшее поддерживаемое сжатие из заголовка Accept-Encoding."""
+    weights = {}
+    for match in re_accept_encoding.finditer(accept_encoding or ''):
+        try:
+            q = float(match.group('q') or 1)
+        except ValueError:
+            q = 0
+        weights[match.group('coding').lower()] = q
+    best, best_q = None, 0
+    for coding in ('br', 'gzip'):
+        if coding not in COMPRESSORS:
+            continue
+        q = weights.get(coding, weights.get('*', 0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Сжимает ответы в brotli или gzip в зависимости от Accept-Encoding.
+
+    Заголовок запроса заранее приводится к выбранному кодированию, поэтому
+    cache_page хранит не больше одной копии страницы на каждое сжатие,
+    а при обёртке view через compress_page в кеш попадает уже сжатое тело.
+    """
+
+    def process_request(self, request):
+        request.META['HTTP_ACCEPT_ENCODING'] = negotiate_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        ) or ''
+
+    def process_response(self, request, response):
+        if (not response.streaming
+                and len(response.content) < MIN_COMPRESS_LENGTH):
+            return response
+        if response.has_header('Content-Encoding'):
+            return response
+        if (response.has_header('Content-Range') or response.get(
+                'Content-Type', '').startswith(INCOMPRESSIBLE_TYPES)):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        encoding = negotiate_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if encoding != 'gzip':
+                return response
+            response.streaming_content = compress_sequence(
+                response.streaming_content
+            )
+            del response['Content-Length']
+        else:
+            compressed_content = COMPRESSORS[encoding](response.content)
+            if len(compressed_content) >= len(response.content):
+                return response
+            response.content = compressed_content
+            response['Content-Length'] = str(len(response.content))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+
+compress_page = decorator_from_middleware(CompressionMiddleware)
+
+
+def user_cache_key(user_id):
+    return 'auth_user:{}'.format(user_id)
+
+
+def get_cached_user(request):
+    """
+    Возвращает пользователя сессии, по возможности без запросов к базе.
+
+    Закешированный объект проверяется так же, как в auth.get_user():
+    по бэкенду и хешу пароля, сохранённым в сессии. Кеш процесса не
+    узнал бы о смене пароля или блокировке в другом воркере, поэтому без
+    общего кеша пользователь всегда читается из базы.
+    """
+    if not is_shared_cache():
+        return auth.get_user(request)
+    try:
+        user_id = auth._get_user_session_key(request)
+        backend_path = request.session[auth.BACKEND_SESSION_KEY]
+    except KeyError:
+        return AnonymousUser()
+    key = user_cache_key(user_id)
+    user = cache.get(key)
+    if user is not None and getattr(user, 'backend', None) == backend_path:
+        session_hash = request.session.get(auth.HASH_SESSION_KEY)
+        if session_hash and constant_time_compare(
+            session_hash, user.get_session_auth_hash()
+        ):
+            return user
+    user = auth.get_user(request)
+    if user.is_authenticated:
+        user.backend = backend_path
+        cache.set(key, user, settings.USER_CACHE_TIME)
+    return user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """AuthenticationMiddleware, берущий пользователя из кеша."""
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: _get_request_user(request))
+
+
+def _get_request_user(request):
+    if not hasattr(request, '_cached_user'):
+        request._cached_user = get_cached_user(request)
+    return request._cached_user
+
+
+RATE_PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 60 * 60 * 24}
+# Итог предыдущего окна хранится в счётчике умноженным на WINDOW_SHIFT.
+WINDOW_SHIFT = 10 ** 6
+
+
+def parse_rate(rate):
+    """Разбирает ограничение вида '10/m' в (количество, период в секундах)."""
+    count, period = rate.split('/')
+    return int(count), RATE_PERIODS[period[0]]
+
+
+def rate_buckets(request, rates):
+    """
+    Возвращает корзины [(идентификатор, ограничение)] для запроса.
+
+    rates — строка ограничения или словарь {'user': ..., 'ip': ...}.
+    Строка задаёт корзину пользователя, а для анонимов — корзину
+    IP-адреса. Корзина 'ip' из словаря проверяется для каждого запроса,
+    поэтому смена аккаунтов не обходит лимит адреса.
+    """
+    ip = 'ip:{}'.format(request.META.get('REMOTE_ADDR'))
+    if isinstance(rates, str):
+        rates = {'user': rates}
+    buckets = []
+    if request.user.is_authenticated:
+        if 'user' in rates:
+            buckets.append((f'user:{request.user.pk}', rates['user']))
+    elif 'user' in rates and 'ip' not in rates:
+        buckets.append((ip, rates['user']))
+    if 'ip' in rates:
+        buckets.append((ip, rates['ip']))
+    return buckets
+
+
+def sliding_retry_after(limit, period, used, previous, elapsed):
+    """
+    Секунды до момента, когда скользящая оценка опустится до limit.
+
+    elapsed — доля текущего окна, прошедшая к моменту запроса.
+    """
+    if used <= limit and previous:
+        wait = 1 - (limit - used) / previous - elapsed
+    else:
+        wait = 1 - elapsed + max(1 - limit / used, 0)
+    return max(1, math.ceil(wait * period))
+
+
+class RateLimitMiddleware(MiddlewareMixin):
+    """
+    Ограничивает частоту записи для view из settings.RATELIMITS.
+
+    Каждый POST-запрос расходует по токену из корзин пользователя и
+    IP-адреса (см. rate_buckets). Корзина — скользящее окно: вклад
+    предыдущего окна убывает по мере хода текущего, поэтому на стыке окон
+    не проходит двойной лимит. Счётчик окна хранит в одном числе и свои
+    токены, и итог предыдущего окна (старшие разряды, см. WINDOW_SHIFT),
+    так что обычный запрос тратит на корзину один атомарный incr.
+    Токены отклонённого запроса возвращаются.
+    """
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method != 'POST':
+            return None
+        rates = settings.RATELIMITS.get(request.resolver_match.view_name)
+        if rates is None:
+            return None
+        now = time.time()
+        spent = []
+        retry_after = 0
+        for ident, rate in rate_buckets(request, rates):
+            limit, period = parse_rate(rate)
+            window = int(now // period)
+            key = 'ratelimit:{}:{}:{{}}'.format(
+                request.resolver_match.view_name, ident
+            )
+            used, previous_used = self.spend(key, window, period)
+            spent.append(key.format(window))
+            elapsed = now / period - window
+            if previous_used * (1 - elapsed) + used > limit:
+                retry_after = max(retry_after, sliding_retry_after(
+                    limit, period, used, previous_used, elapsed
+                ))
+        if not retry_after:
+            return None
+        # Отклонённая запись не должна продлевать блокировку.
+        for key in spent:
+            try:
+                cache.decr(key)
+            except ValueError:
+                pass
+        response = render(
+            request, 'core/429.html', {'retry_after': retry_after},
+            status=429,
+        )
+        response['Retry-After'] = str(retry_after)
+        return response
+
+    @staticmethod
+    def spend(key, window, period):
+        """
+        Атомарно расходует токен окна window.
+
+        Возвращает (токены текущего окна, токены предыдущего окна).
+        Первый запрос окна читает итог предыдущего и переносит его в
+        старшие разряды нового счётчика.
+        """
+        current = key.format(window)
+        try:
+            value = cache.incr(current)
+        except ValueError:
+            previous = cache.get(key.format(window - 1), 0) % WINDOW_SHIFT
+            value = previous * WINDOW_SHIFT + 1
+            # Счётчик нужен ещё одно окно — как предыдущий.
+            if not cache.add(current, value, 2 * period):
+                value = cache.incr(current)
+        return value % WINDOW_SHIFT, value // WINDOW_SHIFT
@@ -0,0 +1,40 @@
+# Generated by Django 2.2.16 on 2026-10-19 19:37
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Task',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Полный путь к функции задачи', max_length=200, verbose_name='Функция')),
+                ('args', models.TextField(default='[]', verbose_name='Аргументы')),
+                ('kwargs', models.TextField(default='{}', verbose_name='Именованные аргументы')),
+                ('priority', models.SmallIntegerField(default=0, verbose_name='Приоритет')),
+                ('status', models.CharField(choices=[('queued', 'В очереди'), ('running', 'Выполняется'), ('done', 'Выполнена'), ('failed', 'Ошибка')], default='queued', max_length=10, verbose_name='Статус')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Попыток')),
+                ('max_attempts', models.PositiveSmallIntegerField(default=5, verbose_name='Максимум попыток')),
+                ('idempotency_key', models.CharField(blank=True, max_length=200, null=True, unique=True, verbose_name='Ключ идемпотентности')),
+                ('run_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Запустить после')),
+                ('started', models.DateTimeField(blank=True, null=True, verbose_name='Начало выполнения')),
+                ('last_error', models.TextField(blank=True, verbose_name='Последняя ошибка')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+            ],
+            options={
+                'ordering': ['-priority', 'run_at', 'id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['status', '-priority', 'run_at'], name='core_task_status_2ab949_idx'),
+        ),
+    ]
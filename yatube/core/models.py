@@ -0,0 +1,80 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Task(models.Model):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField(
+        max_length=200,
+        verbose_name='Функция',
+        help_text='Полный путь к функции задачи'
+    )
+    args = models.TextField(
+        default='[]',
+        verbose_name='Аргументы',
+    )
+    kwargs = models.TextField(
+        default='{}',
+        verbose_name='Именованные аргументы',
+    )
+    priority = models.SmallIntegerField(
+        default=0,
+        verbose_name='Приоритет',
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=QUEUED,
+        verbose_name='Статус',
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попыток',
+    )
+    max_attempts = models.PositiveSmallIntegerField(
+        default=5,
+        verbose_name='Максимум попыток',
+    )
+    idempotency_key = models.CharField(
+        max_length=200,
+        unique=True,
+        blank=True,
+        null=True,
+        verbose_name='Ключ идемпотентности',
+    )
+    run_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Запустить после',
+    )
+    started = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Начало выполнения',
+    )
+    last_error = models.TextField(
+        blank=True,
+        verbose_name='Последняя ошибка',
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата создания',
+    )
+
+    class Meta:
+        ordering = ['-priority', 'run_at', 'id']
+        indexes = [
+            models.Index(fields=['status', '-priority', 'run_at']),
+        ]
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,125 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+def keyset_page(queryset, ordering, after, size):
+    """
+    Возвращает страницу объектов после курсора after и курсор следующей.
+
+    Страница выбирается по индексу (WHERE field > after ORDER BY field)
+    без OFFSET и COUNT. ordering — имя уникального поля или кортеж полей,
+    последнее из которых уникально; '-' перед именем задаёт обратный
+    порядок. Для кортежа полей курсор — кортеж значений той же длины.
+    """
+    fields = (ordering,) if isinstance(ordering, str) else tuple(ordering)
+    if after:
+        values = (after,) if isinstance(ordering, str) else tuple(after)
+        condition = Q()
+        for index, field in enumerate(fields):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            step = Q(**{f'{name}__{lookup}': values[index]})
+            for previous, value in zip(fields[:index], values):
+                step &= Q(**{previous.lstrip('-'): value})
+            condition |= step
+        queryset = queryset.filter(condition)
+    items = list(queryset.order_by(*fields)[:size + 1])
+    next_cursor = None
+    if len(items) > size:
+        items = items[:size]
+        next_cursor = tuple(
+            getattr(items[-1], field.lstrip('-')) for field in fields
+        )
+        if isinstance(ordering, str):
+            next_cursor = next_cursor[0]
+    return items, next_cursor
+
+
+def count_cache_key(queryset):
+    """Ключ кеша COUNT(*) — хеш SQL-запроса queryset с параметрами."""
+    sql, params = queryset.query.sql_with_params()
+    return 'paginator_count:{}'.format(hashlib.md5(
+        repr((sql, params)).encode()
+    ).hexdigest())
+
+
+def cached_count(queryset):
+    """COUNT(*) queryset, закешированный на PAGINATOR_COUNT_CACHE_TIME."""
+    try:
+        key = count_cache_key(queryset)
+    except EmptyResultSet:
+        return 0
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, settings.PAGINATOR_COUNT_CACHE_TIME)
+    return count
+
+
+def forget_count(queryset):
+    try:
+        cache.delete(count_cache_key(queryset))
+    except EmptyResultSet:
+        pass
+
+
+class CachedCountPaginator(Paginator):
+    """
+    Paginator, кеширующий COUNT(*) queryset на PAGINATOR_COUNT_CACHE_TIME.
+
+    Ключ кеша — хеш SQL-запроса с параметрами, поэтому одинаковые ленты
+    разных запросов делят один счётчик. Число страниц может отставать от
+    реального на время жизни кеша. Если из-за устаревшего счётчика
+    get_page() попадает за реальный конец списка, счётчик пересчитывается
+    и отдаётся последняя существующая страница. Последовательность не
+    из queryset кеширует свой count() сама и сбрасывает его методом
+    forget_count().
+    """
+
+    @cached_property
+    def count(self):
+        if hasattr(self.object_list, 'query'):
+            return cached_count(self.object_list)
+        return super().count
+
+    def _forget_count(self):
+        if hasattr(self.object_list, 'query'):
+            forget_count(self.object_list)
+        else:
+            self.object_list.forget_count()
+        for name in ('count', 'num_pages'):
+            self.__dict__.pop(name, None)
+
+    def get_page(self, number):
+        page = super().get_page(number)
+        if page.number > 1 and not page.object_list:
+            self._forget_count()
+            page = super().get_page(number)
+        return page
+
+
+def page_window(number, num_pages, on_each_side=2, on_ends=1):
+    """
+    Возвращает номера страниц вокруг текущей и по краям диапазона.
+
+    Пропуски между группами номеров обозначены None:
+    page_window(10, 50) == [1, None, 8, 9, 10, 11, 12, None, 50].
+    """
+    pages = set(range(1, min(on_ends, num_pages) + 1))
+    pages.update(range(max(num_pages - on_ends + 1, 1), num_pages + 1))
+    pages.update(range(
+        max(number - on_each_side, 1),
+        min(number + on_each_side, num_pages) + 1,
+    ))
+    window = []
+    for page in sorted(pages):
+        if window and page != window[-1] + 1:
+            window.append(None)
+        window.append(page)
+    return window
@@ -0,0 +1,59 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import (
+    BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY,
+)
+from django.contrib.sessions.backends.cached_db import (
+    SessionStore as CachedDBStore
+)
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+
+from .locks import is_shared_cache
+
+
+PERSISTED_KEY = '_persisted_at'
+AUTH_KEYS = (SESSION_KEY, BACKEND_SESSION_KEY, HASH_SESSION_KEY)
+
+
+def _auth_state(data):
+    return tuple(data.get(key) for key in AUTH_KEYS)
+
+
+class SessionStore(CachedDBStore):
+    """
+    Сессии читаются из кеша, а в базу записываются отложенно.
+
+    Новая сессия, первое её изменение и любая смена данных входа сразу
+    сохраняются в базу, прочие изменения попадают туда не чаще одного
+    раза в SESSION_WRITE_BEHIND_INTERVAL секунд. Кеш используется только
+    общий для воркеров: с LocMemCache процесс не увидел бы выход или
+    удаление сессии в другом процессе, поэтому сессия и читается из базы,
+    и каждое сохранение идёт туда же.
+    """
+
+    def load(self):
+        if is_shared_cache(settings.SESSION_CACHE_ALIAS):
+            data = super().load()
+        else:
+            data = DBStore.load(self)
+        self._loaded_auth = _auth_state(data)
+        return data
+
+    def save(self, must_create=False):
+        if self.session_key is None:
+            return self.create()
+        data = self._get_session(no_load=must_create)
+        now = int(time.time())
+        persisted_at = data.get(PERSISTED_KEY, 0)
+        if (
+            must_create
+            or not is_shared_cache(settings.SESSION_CACHE_ALIAS)
+            or _auth_state(data) != getattr(self, '_loaded_auth', None)
+            or now - persisted_at >= settings.SESSION_WRITE_BEHIND_INTERVAL
+        ):
+            data[PERSISTED_KEY] = now
+            super().save(must_create)
+            self._loaded_auth = _auth_state(data)
+        else:
+            self._cache.set(self.cache_key, data, self.get_expiry_age())
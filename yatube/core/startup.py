@@ -0,0 +1,114 @@
+"""
+Замер стоимости запуска воркера.
+
+main() выполняется в отдельном процессе с ключом -X importtime: он
+поднимает Django так же, как WSGI-сервер, оборачивает AppConfig.ready()
+каждого приложения таймером и печатает замеры в stdout в виде JSON,
+а время импорта модулей интерпретатор пишет в stderr.
+"""
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+
+re_importtime = re.compile(
+    r'^import time:\s+(?P<self>\d+) \|\s+(?P<cumulative>\d+) \|'
+    r'(?P<indent>\s+)(?P<module>\S+)$'
+)
+
+# Модули, которые не должны загружаться при старте воркера.
+LAZY_MODULES = ('PIL', 'numpy', 'scipy', 'sorl.thumbnail.engines')
+
+
+def _timed_ready(app_config, timings):
+    ready = app_config.ready
+
+    def wrapper():
+        started = time.perf_counter()
+        try:
+            ready()
+        finally:
+            timings[app_config.label] = (
+                time.perf_counter() - started
+            ) * 1000
+    app_config.ready = wrapper
+
+
+def main():
+    from django.apps.config import AppConfig
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+    timings = {}
+    create = AppConfig.create.__func__
+
+    def timed_create(cls, entry):
+        app_config = create(cls, entry)
+        _timed_ready(app_config, timings)
+        return app_config
+    AppConfig.create = classmethod(timed_create)
+
+    started = time.perf_counter()
+    from django.core.wsgi import get_wsgi_application
+    from django.urls import get_resolver
+
+    get_wsgi_application()
+    get_resolver().url_patterns
+    total = (time.perf_counter() - started) * 1000
+    json.dump({
+        'total_ms': total,
+        'ready_ms': timings,
+        'loaded': sorted(
+            name for name in LAZY_MODULES if name in sys.modules
+        ),
+    }, sys.stdout)
+
+
+def parse_importtime(lines):
+    """Разбирает вывод -X importtime в [(модуль, своё, всего)] в мкс."""
+    modules = []
+    for line in lines:
+        match = re_importtime.match(line.rstrip('\n'))
+        if match:
+            modules.append((
+                match.group('module'),
+                int(match.group('self')),
+                int(match.group('cumulative')),
+            ))
+    return modules
+
+
+def group_by_package(modules):
+    """Суммирует собственное время импорта по пакетам верхнего уровня."""
+    packages = defaultdict(int)
+    for module, own, _ in modules:
+        packages[module.split('.')[0]] += own
+    return sorted(packages.items(), key=lambda item: -item[1])
+
+
+def profile():
+    """Запускает main() в новом процессе и возвращает (замеры, модули)."""
+    from django.conf import settings
+
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c',
+         'from core.startup import main; main()'],
+        cwd=settings.BASE_DIR,
+        env=dict(
+            os.environ,
+            DJANGO_SETTINGS_MODULE=os.environ.get(
+                'DJANGO_SETTINGS_MODULE', 'yatube.settings'
+            ),
+        ),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    return (
+        json.loads(result.stdout),
+        parse_importtime(result.stderr.splitlines()),
+    )
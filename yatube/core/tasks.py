@@ -0,0 +1,147 @@
+import json
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Task
+
+
+def enqueue(name, args=(), kwargs=None, priority=0, countdown=0,
+            idempotency_key=None, max_attempts=None):
+    """
+    Ставит задачу в очередь.
+
+    Строка задачи пишется в текущей транзакции вызывающего кода, поэтому
+    воркер увидит её только после коммита и не увидит при откате.
+    Повторная постановка с тем же idempotency_key игнорируется.
+    """
+    Task.objects.bulk_create([Task(
+        name=name,
+        args=json.dumps(list(args)),
+        kwargs=json.dumps(kwargs or {}),
+        priority=priority,
+        run_at=timezone.now() + timedelta(seconds=countdown),
+        idempotency_key=idempotency_key,
+        max_attempts=max_attempts or settings.TASKS_MAX_ATTEMPTS,
+    )], ignore_conflicts=True)
+
+
+def release_idempotency_key(key):
+    """Позволяет снова поставить в очередь задачу с ключом key."""
+    Task.objects.filter(idempotency_key=key).update(idempotency_key=None)
+
+
+def task(priority=0, max_attempts=None):
+    """
+    Регистрирует функцию как фоновую задачу.
+
+    У функции появляются методы delay(*args, **kwargs) и
+    enqueue(args, kwargs, countdown=..., idempotency_key=...).
+    """
+    def decorator(func):
+        name = f'{func.__module__}.{func.__name__}'
+
+        def enqueue_task(args=(), kwargs=None, **options):
+            options.setdefault('priority', priority)
+            options.setdefault('max_attempts', max_attempts)
+            enqueue(name, args, kwargs, **options)
+
+        def delay(*args, **kwargs):
+            enqueue_task(args, kwargs)
+
+        func.enqueue = enqueue_task
+        func.delay = delay
+        return func
+    return decorator
+
+
+def claim_next():
+    """Атомарно забирает следующую готовую задачу или возвращает None."""
+    now = timezone.now()
+    candidates = Task.objects.filter(
+        status=Task.QUEUED, run_at__lte=now
+    ).order_by('-priority', 'run_at', 'id').values_list('id', flat=True)
+    for task_id in candidates[:10]:
+        claimed = Task.objects.filter(
+            id=task_id, status=Task.QUEUED
+        ).update(
+            status=Task.RUNNING, started=now, attempts=F('attempts') + 1
+        )
+        if claimed:
+            return Task.objects.get(id=task_id)
+    return None
+
+
+def retry_delay(attempts):
+    return min(
+        settings.TASKS_RETRY_DELAY * 2 ** (attempts - 1),
+        settings.TASKS_MAX_RETRY_DELAY,
+    )
+
+
+def execute(claimed):
+    """Выполняет задачу; при ошибке планирует повтор с экспоненциальной
+    задержкой или помечает задачу проваленной."""
+    try:
+        func = import_string(claimed.name)
+        func(*json.loads(claimed.args), **json.loads(claimed.kwargs))
+    except Exception:
+        claimed.last_error = traceback.format_exc()
+        if claimed.attempts >= claimed.max_attempts:
+            claimed.status = Task.FAILED
+        else:
+            claimed.status = Task.QUEUED
+            claimed.run_at = timezone.now() + timedelta(
+                seconds=retry_delay(claimed.attempts)
+            )
+        claimed.save(update_fields=['status', 'run_at', 'last_error'])
+        return False
+    Task.objects.filter(id=claimed.id).update(status=Task.DONE)
+    return True
+
+
+def run_pending(limit=None):
+    """Выполняет готовые задачи в текущем процессе, пока они есть."""
+    executed = 0
+    while limit is None or executed < limit:
+        claimed = claim_next()
+        if claimed is None:
+            break
+        execute(claimed)
+        executed += 1
+    return executed
+
+
+def requeue_stale():
+    """Возвращает в очередь задачи, зависшие после падения воркера."""
+    deadline = timezone.now() - timedelta(seconds=settings.TASKS_STALE_TIMEOUT)
+    return Task.objects.filter(
+        status=Task.RUNNING, started__lt=deadline
+    ).update(status=Task.QUEUED)
+
+
+def delete_finished(batch_size=1000):
+    """
+    Удаляет пачку выполненных задач старше TASKS_DONE_RETENTION.
+
+    Вместе с ними освобождаются их ключи идемпотентности. Проваленные
+    задачи остаются для разбора.
+    """
+    deadline = timezone.now() - timedelta(
+        seconds=settings.TASKS_DONE_RETENTION
+    )
+    ids = list(Task.objects.filter(
+        status=Task.DONE, started__lt=deadline
+    ).values_list('id', flat=True)[:batch_size])
+    if ids:
+        Task.objects.filter(id__in=ids).delete()
+    return len(ids)
+
+
+def maintain():
+    """Обслуживание очереди, которое воркеры выполняют периодически."""
+    return requeue_stale(), delete_finished()
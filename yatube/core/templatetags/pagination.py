@@ -0,0 +1,12 @@
+from django import template
+
+from core.pagination import page_window
+
+
+register = template.Library()
+
+
+@register.filter
+def window(page_obj):
+    """Номера страниц для навигации: окно вокруг текущей и края."""
+    return page_window(page_obj.number, page_obj.paginator.num_pages)
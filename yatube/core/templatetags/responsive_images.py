@@ -0,0 +1,32 @@
+import logging
+
+from django import template
+from django.conf import settings
+
+from core.thumbnails import responsive_thumbnails
+
+
+logger = logging.getLogger(__name__)
+register = template.Library()
+
+
+@register.inclusion_tag('includes/responsive_image.html')
+def responsive_image(image, width=None, placeholder=''):
+    """
+    <picture> с набором миниатюр image и ленивой загрузкой.
+
+    width — ширина исходника, если известна: миниатюры шире не строятся.
+    placeholder — data URI размытого превью для фона до загрузки.
+    Как и тег thumbnail из sorl, при ошибке ничего не выводит.
+    """
+    if not image:
+        return {}
+    try:
+        thumbnails = responsive_thumbnails(image, width)
+    except Exception:
+        logger.warning('Не удалось построить миниатюры %s', image,
+                       exc_info=True)
+        return {}
+    return dict(
+        thumbnails, sizes=settings.THUMBNAIL_SIZES, placeholder=placeholder
+    )
@@ -1,4 +1,41 @@
-from django.test import Client, TestCase
+import gzip
+import os
+import shutil
+import signal
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.auth import SESSION_KEY, get_user_model
+from django.core.cache import cache
+from django.template import Context, Template
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core import checks, health, locks, startup, tasks, thumbnails
+from core.management.commands import run_worker
+from core.media import Unsatisfiable, parse_range
+from core.middleware import COMPRESSORS, negotiate_encoding, user_cache_key
+from core.models import Task
+from core.sessions import PERSISTED_KEY, SessionStore
+
+
+User = get_user_model()
+CALLS = []
+
+
+@tasks.task(priority=5)
+def record_call(value):
+    CALLS.append(value)
+
+
+@tasks.task()
+def fail_always():
+    raise RuntimeError('Ошибка задачи')
 
 
 class AboutTests(TestCase):
@@ -10,3 +47,530 @@ class AboutTests(TestCase):
         """URL-адрес ошибки 404 использует правильный шаблон"""
         response = self.guest_client.get('/wrong_address')
         self.assertTemplateUsed(response, 'core/404.html')
+
+
+class CompressionMiddlewareTests(TestCase):
+
+    def setUp(self):
+        self.guest_client = Client()
+        cache.clear()
+
+    def test_negotiate_encoding(self):
+        """Выбирается поддерживаемое сжатие с учётом q-значений."""
+        self.assertEqual(negotiate_encoding('gzip, deflate'), 'gzip')
+        self.assertIsNone(negotiate_encoding('gzip;q=0'))
+        self.assertIsNone(negotiate_encoding(''))
+        self.assertIsNone(negotiate_encoding('identity'))
+
+    def test_response_is_gzipped(self):
+        """Страница сжимается при поддержке gzip клиентом."""
+        response = self.guest_client.get(
+            reverse('about:author'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertIn(b'<html', gzip.decompress(response.content))
+
+    def test_cached_index_is_not_recompressed(self):
+        """Из кеша index отдаётся уже сжатая страница."""
+        compress = mock.Mock(side_effect=COMPRESSORS['gzip'])
+        with mock.patch.dict(COMPRESSORS, {'gzip': compress}):
+            first = self.guest_client.get(
+                reverse('posts:index'), HTTP_ACCEPT_ENCODING='gzip')
+            second = self.guest_client.get(
+                reverse('posts:index'),
+                HTTP_ACCEPT_ENCODING='deflate, gzip;q=0.8')
+        self.assertEqual(compress.call_count, 1)
+        self.assertEqual(second['Content-Encoding'], 'gzip')
+        self.assertEqual(first.content, second.content)
+
+
+@mock.patch('notifications.inbox.is_shared_cache', return_value=True)
+@mock.patch('core.middleware.is_shared_cache', return_value=True)
+@mock.patch('core.sessions.is_shared_cache', return_value=True)
+class CachedSessionTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='auth')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_authenticated_request_without_queries(self, *mocks):
+        """Повторный запрос авторизованного пользователя не ходит в базу."""
+        self.authorized_client.get(reverse('about:author'))
+        with self.assertNumQueries(0):
+            response = self.authorized_client.get(reverse('about:author'))
+        self.assertEqual(response.context['user'], self.user)
+
+    def test_cached_user_invalidated_on_password_change(self, *mocks):
+        """Смена пароля сбрасывает кеш и завершает старую сессию."""
+        self.authorized_client.get(reverse('about:author'))
+        self.assertIsNotNone(cache.get(user_cache_key(self.user.pk)))
+        self.user.set_password('new-password-123')
+        self.user.save()
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+        response = self.authorized_client.get(reverse('about:author'))
+        self.assertFalse(response.context['user'].is_authenticated)
+
+
+class LocalCacheSessionTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='auth')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.authorized_client.get(reverse('about:author'))
+
+    def assertLoggedOut(self):
+        response = self.authorized_client.get(reverse('about:author'))
+        self.assertFalse(response.context['user'].is_authenticated)
+
+    def test_session_deleted_elsewhere(self):
+        """Без общего кеша выход в другом процессе виден сразу."""
+        SessionStore.get_model_class().objects.all().delete()
+        self.assertLoggedOut()
+
+    def test_user_deactivated_elsewhere(self):
+        """Без общего кеша блокировка пользователя видна сразу."""
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertLoggedOut()
+
+
+class SessionWriteBehindTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='auth')
+        self.store = SessionStore()
+        self.store['theme'] = 'dark'
+        self.store.create()
+
+    def reload(self):
+        return SessionStore(self.store.session_key)
+
+    def db_data(self):
+        session = SessionStore.get_model_class().objects.get(
+            session_key=self.store.session_key)
+        return self.store.decode(session.session_data)
+
+    def test_local_cache_writes_through(self):
+        """С LocMemCache каждое изменение сразу попадает в базу."""
+        session = self.reload()
+        session['theme'] = 'light'
+        session.save()
+        self.assertEqual(self.db_data()['theme'], 'light')
+
+    @mock.patch('core.sessions.is_shared_cache', return_value=True)
+    def test_shared_cache_defers_plain_changes(self, is_shared_cache):
+        """С общим кешем обычное изменение откладывается до интервала."""
+        session = self.reload()
+        session[PERSISTED_KEY] = int(time.time())
+        session.save()
+        session = self.reload()
+        session['theme'] = 'light'
+        session.save()
+        self.assertEqual(self.db_data()['theme'], 'dark')
+        self.assertEqual(self.reload()['theme'], 'light')
+
+    @mock.patch('core.sessions.is_shared_cache', return_value=True)
+    def test_shared_cache_writes_login_through(self, is_shared_cache):
+        """Вход пользователя сохраняется в базу сразу."""
+        session = self.reload()
+        session[PERSISTED_KEY] = int(time.time())
+        session.save()
+        session = self.reload()
+        session[SESSION_KEY] = str(self.user.pk)
+        session.save()
+        self.assertEqual(self.db_data()[SESSION_KEY], str(self.user.pk))
+
+
+class CacheLockTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_lock_is_exclusive(self):
+        with locks.cache_lock('resource') as first:
+            with locks.cache_lock('resource', attempts=2) as second:
+                self.assertTrue(first)
+                self.assertFalse(second)
+        with locks.cache_lock('resource') as again:
+            self.assertTrue(again)
+
+    def test_deploy_check_warns_about_local_cache(self):
+        """LocMemCache в продакшене даёт предупреждение core.W001."""
+        messages = checks.check_shared_cache(None)
+        self.assertEqual([message.id for message in messages], ['core.W001'])
+        with mock.patch('core.checks.is_shared_cache', return_value=True):
+            self.assertEqual(checks.check_shared_cache(None), [])
+
+
+class RateLimitMiddlewareTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='auth')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    @override_settings(RATELIMITS={'posts:post_create': '2/h'})
+    def test_post_create_is_rate_limited(self):
+        """После исчерпания лимита создание поста возвращает 429."""
+        for _ in range(2):
+            response = self.authorized_client.post(
+                reverse('posts:post_create'), data={'text': 'Текст'})
+            self.assertEqual(response.status_code, 302)
+        response = self.authorized_client.post(
+            reverse('posts:post_create'), data={'text': 'Текст'})
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        response = self.authorized_client.get(reverse('posts:post_create'))
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(RATELIMITS={'posts:post_create': '1/h'})
+    def test_buckets_are_per_user(self):
+        """Лимит одного пользователя не влияет на другого."""
+        other_client = Client()
+        other_client.force_login(
+            User.objects.create_user(username='other'))
+        for client in (self.authorized_client, other_client):
+            response = client.post(
+                reverse('posts:post_create'), data={'text': 'Текст'})
+            self.assertEqual(response.status_code, 302)
+
+    @override_settings(RATELIMITS={
+        'posts:post_create': {'user': '5/h', 'ip': '2/h'}})
+    def test_ip_bucket_shared_by_accounts(self):
+        """Смена аккаунта не обходит лимит IP-адреса."""
+        clients = [self.authorized_client, Client(), Client()]
+        for number, client in enumerate(clients[1:]):
+            client.force_login(
+                User.objects.create_user(username=f'other_{number}'))
+        statuses = [
+            client.post(
+                reverse('posts:post_create'), data={'text': 'Текст'}
+            ).status_code
+            for client in clients
+        ]
+        self.assertEqual(statuses, [302, 302, 429])
+
+    @override_settings(RATELIMITS={'posts:post_create': '4/h'})
+    def test_window_edge_does_not_double_limit(self):
+        """На стыке окон не проходит удвоенный лимит."""
+        hour = 60 * 60
+        start = 1000 * hour
+
+        def post_at(moment):
+            with mock.patch('core.middleware.time.time',
+                            return_value=moment):
+                return self.authorized_client.post(
+                    reverse('posts:post_create'), data={'text': 'Текст'}
+                ).status_code
+
+        statuses = [post_at(start + hour - 1) for _ in range(4)]
+        statuses += [post_at(start + hour + 1) for _ in range(4)]
+        self.assertEqual(statuses, [302] * 4 + [429] * 4)
+        self.assertEqual(post_at(start + 2 * hour + 1), 302)
+
+    @override_settings(RATELIMITS={
+        'posts:post_create': {'user': '5/h', 'ip': '5/h'}})
+    def test_one_incr_per_bucket(self):
+        """Обычный запрос тратит на каждую корзину один incr."""
+        self.authorized_client.post(
+            reverse('posts:post_create'), data={'text': 'Текст'})
+        calls = []
+
+        def record(name):
+            method = getattr(cache, name)
+
+            def wrapper(*args, **kwargs):
+                calls.append(name)
+                return method(*args, **kwargs)
+            return wrapper
+
+        with mock.patch.multiple(cache, **{
+            name: record(name) for name in ('get', 'get_many', 'add', 'incr')
+        }), mock.patch('posts.views.render', side_effect=AssertionError):
+            with self.assertRaises(AssertionError):
+                self.authorized_client.post(reverse('posts:post_create'))
+        self.assertEqual(calls, ['incr', 'incr'])
+
+
+class TaskQueueTests(TestCase):
+
+    def setUp(self):
+        CALLS.clear()
+
+    def test_tasks_run_by_priority(self):
+        """Задачи выполняются в порядке приоритета."""
+        tasks.enqueue('core.tests.record_call', args=['low'])
+        record_call.delay('high')
+        self.assertEqual(tasks.run_pending(), 2)
+        self.assertEqual(CALLS, ['high', 'low'])
+        self.assertEqual(
+            Task.objects.filter(status=Task.DONE).count(), 2)
+
+    def test_idempotency_key_deduplicates(self):
+        """Повторная постановка с тем же ключом не создаёт задачу."""
+        for _ in range(2):
+            record_call.enqueue(['once'], idempotency_key='once')
+        tasks.run_pending()
+        self.assertEqual(CALLS, ['once'])
+
+    def test_failed_task_retried_with_backoff(self):
+        """Упавшая задача откладывается, а после лимита помечается
+        проваленной."""
+        fail_always.enqueue(max_attempts=2)
+        tasks.run_pending()
+        failed = Task.objects.get()
+        self.assertEqual(failed.status, Task.QUEUED)
+        self.assertGreater(failed.run_at, failed.created)
+        self.assertIn('Ошибка задачи', failed.last_error)
+        Task.objects.update(run_at=failed.created)
+        tasks.run_pending()
+        self.assertEqual(Task.objects.get().status, Task.FAILED)
+
+    def test_countdown_delays_task(self):
+        """Отложенная задача не выполняется раньше времени."""
+        record_call.enqueue(['later'], countdown=60)
+        self.assertEqual(tasks.run_pending(), 0)
+
+    def test_worker_loop_maintains_queue(self):
+        """Цикл воркера возвращает зависшие задачи и чистит старые."""
+        record_call.enqueue(['stale'])
+        record_call.enqueue(['old'], idempotency_key='old')
+        long_ago = timezone.now() - timedelta(days=30)
+        Task.objects.filter(args='["stale"]').update(
+            status=Task.RUNNING, started=long_ago)
+        Task.objects.filter(args='["old"]').update(
+            status=Task.DONE, started=long_ago)
+        with mock.patch('core.management.commands.run_worker.connections'):
+            run_worker.work(0, True, threading.Event())
+        self.assertEqual(CALLS, ['stale'])
+        self.assertFalse(Task.objects.filter(idempotency_key='old').exists())
+        record_call.enqueue(['old'], idempotency_key='old')
+        self.assertEqual(tasks.run_pending(), 1)
+
+    def test_sigterm_stops_worker_after_current_task(self):
+        """После SIGTERM воркер доделывает задачу и выходит."""
+        stop = threading.Event()
+
+        def terminate(*args):
+            os.kill(os.getpid(), signal.SIGTERM)
+            CALLS.append(args)
+
+        previous = signal.getsignal(signal.SIGTERM)
+        self.addCleanup(signal.signal, signal.SIGTERM, previous)
+        record_call.delay('first')
+        record_call.delay('second')
+        with mock.patch('core.tests.record_call', side_effect=terminate), \
+                mock.patch(
+                    'core.management.commands.run_worker.connections'):
+            run_worker.work(0, False, stop)
+        self.assertTrue(stop.is_set())
+        self.assertEqual(
+            Task.objects.filter(status=Task.DONE).count(), 1)
+        self.assertEqual(
+            Task.objects.filter(status=Task.QUEUED).count(), 1)
+
+
+def slow_check():
+    time.sleep(0.5)
+
+
+@override_settings(HEALTH_CHECK_TIMEOUT=0.2)
+class HealthTests(TestCase):
+
+    def setUp(self):
+        health._cached = None
+        self.media_root = tempfile.mkdtemp()
+        self.settings = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings.enable()
+
+    def tearDown(self):
+        self.settings.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def test_live(self):
+        """Проверка живости не обращается к зависимостям."""
+        with self.assertNumQueries(0):
+            response = self.client.get('/health/live')
+        self.assertEqual(response.json(), {'status': 'ok'})
+
+    def test_ready_reports_latencies(self):
+        """Проверка готовности возвращает задержку каждой зависимости."""
+        response = self.client.get('/health/ready')
+        self.assertEqual(response.status_code, 200)
+        checks = response.json()['checks']
+        self.assertEqual(set(checks), set(health.CHECKS))
+        for name, result in checks.items():
+            with self.subTest(check=name):
+                self.assertTrue(result['ok'])
+                self.assertGreaterEqual(result['latency_ms'], 0)
+
+    def test_slow_check_fails_by_timeout(self):
+        """Зависшая проверка завершается по таймауту с кодом 503."""
+        with mock.patch.dict(health.CHECKS, {'database': slow_check}):
+            response = self.client.get('/health/ready')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(
+            response.json()['checks']['database'],
+            {'ok': False, 'error': 'timeout'})
+
+    def test_ready_result_cached(self):
+        """Частые пробы получают сохранённый результат."""
+        self.client.get('/health/ready')
+        check = mock.Mock()
+        with mock.patch.dict(health.CHECKS, {'cache': check}):
+            self.client.get('/health/ready')
+        check.assert_not_called()
+
+
+class StartupProfileTests(TestCase):
+
+    def test_parse_importtime(self):
+        """Вывод -X importtime разбирается по модулям и пакетам."""
+        modules = startup.parse_importtime([
+            'import time: self [us] | cumulative | imported package',
+            'import time:       120 |        120 |     django.utils',
+            'import time:        30 |        150 |   django',
+            'import time:        40 |         40 | posts.views',
+        ])
+        self.assertEqual(modules, [
+            ('django.utils', 120, 120),
+            ('django', 30, 150),
+            ('posts.views', 40, 40),
+        ])
+        self.assertEqual(
+            startup.group_by_package(modules),
+            [('django', 150), ('posts', 40)])
+
+    def test_heavy_modules_not_loaded_on_startup(self):
+        """Воркер стартует без Pillow, движков миниатюр и numpy."""
+        measured, modules = startup.profile()
+        self.assertEqual(measured['loaded'], [])
+        self.assertIn('posts', measured['ready_ms'])
+        self.assertTrue(modules)
+
+
+class MediaServingTests(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings.enable()
+        os.mkdir(os.path.join(self.media_root, 'posts'))
+        self.content = bytes(range(256)) * 40
+        with open(os.path.join(self.media_root, 'posts', 'a.gif'), 'wb') as f:
+            f.write(self.content)
+        self.url = '/media/posts/a.gif'
+
+    def tearDown(self):
+        self.settings.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def test_parse_range(self):
+        """Разбираются одиночные диапазоны байт."""
+        cases = {
+            'bytes=0-9': (0, 9),
+            'bytes=100-': (100, 999),
+            'bytes=-10': (990, 999),
+            'bytes=990-5000': (990, 999),
+            'bytes=0-1,5-6': None,
+            'items=0-1': None,
+            None: None,
+        }
+        for header, expected in cases.items():
+            with self.subTest(header=header):
+                self.assertEqual(parse_range(header, 1000), expected)
+        with self.assertRaises(Unsatisfiable):
+            parse_range('bytes=1000-', 1000)
+
+    def test_file_streamed_with_cache_headers(self):
+        """Файл отдаётся потоком с долгим кешированием и без сжатия."""
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        self.assertEqual(response['Content-Type'], 'image/gif')
+        self.assertEqual(response['Content-Length'], str(len(self.content)))
+        self.assertIn('max-age=31536000', response['Cache-Control'])
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_range_request(self):
+        """Запрос с Range получает 206 и только нужные байты."""
+        response = self.client.get(self.url, HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(
+            b''.join(response.streaming_content), self.content[10:20])
+        self.assertEqual(
+            response['Content-Range'], f'bytes 10-19/{len(self.content)}')
+        response = self.client.get(self.url, HTTP_RANGE='bytes=99999-')
+        self.assertEqual(response.status_code, 416)
+
+    def test_conditional_request(self):
+        """Повторный запрос с совпавшим ETag получает 304."""
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(
+            self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(MEDIA_SENDFILE='x-accel-redirect')
+    def test_accel_redirect(self):
+        """При MEDIA_SENDFILE файл отдаёт веб-сервер."""
+        response = self.client.get(self.url)
+        self.assertEqual(
+            response['X-Accel-Redirect'], '/protected-media/posts/a.gif')
+        self.assertEqual(response.content, b'')
+
+    def test_path_outside_media_root(self):
+        """Файлы вне MEDIA_ROOT и каталоги не отдаются."""
+        for url in ('/media/../manage.py', '/media/posts/', '/media/none'):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+
+def fake_thumbnail(image, geometry, **options):
+    width, height = map(int, geometry.split('x'))
+    extension = options.get('format', 'JPEG').lower()
+    return SimpleNamespace(
+        url=f'/media/cache/{geometry}.{extension}', width=width,
+        height=height)
+
+
+@mock.patch('sorl.thumbnail.get_thumbnail', side_effect=fake_thumbnail)
+class ResponsiveImageTests(SimpleTestCase):
+    def setUp(self):
+        thumbnails.modern_formats.cache_clear()
+        self.addCleanup(thumbnails.modern_formats.cache_clear)
+
+    def render(self, width):
+        return Template(
+            '{% load responsive_images %}{% responsive_image image width %}'
+        ).render(Context({'image': 'posts/image.png', 'width': width}))
+
+    def test_narrow_source_not_upscaled(self, get_thumbnail):
+        """Узкая картинка отдаётся одним кадром своей ширины."""
+        self.assertEqual(thumbnails.thumbnail_widths(200), [200])
+        self.assertEqual(thumbnails.thumbnail_widths(500), [320, 480])
+        html = self.render(200)
+        self.assertIn('srcset="/media/cache/200x71.jpeg 200w"', html)
+        self.assertIn('width="200" height="71"', html)
+
+    def test_webp_source_when_supported(self, get_thumbnail):
+        """Если Pillow умеет WEBP, он предлагается первым через <source>."""
+        with mock.patch('PIL.features.check', return_value=True):
+            html = self.render(700)
+        self.assertIn('<source type="image/webp"', html)
+        self.assertIn('/media/cache/640x226.webp 640w', html)
+        self.assertIn('/media/cache/640x226.jpeg 640w', html)
+
+    def test_no_webp_source_without_encoder(self, get_thumbnail):
+        """Без кодека WEBP остаётся только основной формат."""
+        with mock.patch('PIL.features.check', return_value=False):
+            html = self.render(700)
+        self.assertNotIn('<source', html)
+        self.assertIn('loading="lazy"', html)
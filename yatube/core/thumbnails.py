@@ -0,0 +1,82 @@
+"""
+Наборы миниатюр разной ширины для адаптивных картинок.
+
+Для каждой ширины из THUMBNAIL_WIDTHS строится кадр с пропорциями
+ленты (960x339). Браузер выбирает подходящий по srcset/sizes, а если
+Pillow умеет кодировать WEBP, получает его через <source> в <picture>;
+иначе остаётся только JPEG. Кадры шире исходной картинки не строятся;
+upscale нужен лишь затем, чтобы невысокая картинка заполнила кадр по
+высоте.
+"""
+from functools import lru_cache
+
+from django.conf import settings
+
+
+ASPECT_WIDTH, ASPECT_HEIGHT = 960, 339
+THUMBNAIL_OPTIONS = {'crop': 'center', 'upscale': True}
+MODERN_FORMATS = (('WEBP', 'image/webp'),)
+
+
+def thumbnail_widths(width=None):
+    """
+    Ширины из THUMBNAIL_WIDTHS, не превышающие исходную width.
+
+    Картинка уже самой узкой ширины отдаётся одним кадром своей ширины.
+    """
+    widths = sorted(settings.THUMBNAIL_WIDTHS)
+    if not width:
+        return widths
+    return [w for w in widths if w <= width] or [width]
+
+
+def geometry(width):
+    return '{}x{}'.format(width, round(width * ASPECT_HEIGHT / ASPECT_WIDTH))
+
+
+@lru_cache(maxsize=None)
+def modern_formats():
+    """Современные форматы из MODERN_FORMATS, которые умеет Pillow."""
+    from PIL import features
+
+    return tuple(
+        (image_format, mime) for image_format, mime in MODERN_FORMATS
+        if features.check(image_format.lower())
+    )
+
+
+def responsive_thumbnails(image, width=None):
+    """
+    Строит миниатюры image всех подходящих ширин и форматов.
+
+    Возвращает src и размеры самой широкой миниатюры, srcset основного
+    формата и список sources [{'type', 'srcset'}] современных форматов.
+    """
+    # sorl и Pillow загружаются при первой обработке картинки.
+    from sorl.thumbnail import get_thumbnail
+
+    widths = thumbnail_widths(width)
+
+    def build(**options):
+        thumbnails = [
+            get_thumbnail(
+                image, geometry(w), **THUMBNAIL_OPTIONS, **options
+            )
+            for w in widths
+        ]
+        return thumbnails, ', '.join(
+            f'{thumbnail.url} {w}w' for thumbnail, w in zip(thumbnails, widths)
+        )
+
+    thumbnails, srcset = build()
+    largest = thumbnails[-1]
+    return {
+        'src': largest.url,
+        'width': largest.width,
+        'height': largest.height,
+        'srcset': srcset,
+        'sources': [
+            {'type': mime, 'srcset': build(format=image_format)[1]}
+            for image_format, mime in modern_formats()
+        ],
+    }
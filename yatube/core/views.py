@@ -1,4 +1,19 @@
+import mimetypes
+import os
+import stat
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse
 from django.shortcuts import render
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_safe
+
+from . import health
+from .media import RangeFile, Unsatisfiable, parse_range
 
 
 def page_not_found(request, exception):
@@ -7,3 +22,107 @@ def page_not_found(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+@never_cache
+def health_live(request):
+    return JsonResponse({'status': 'ok'})
+
+
+@never_cache
+def health_ready(request):
+    ok, checks = health.readiness()
+    return JsonResponse(
+        {'status': 'ok' if ok else 'fail', 'checks': checks},
+        status=200 if ok else 503,
+    )
+
+
+def _range_applies(request, etag, mtime):
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == int(mtime)
+
+
+@require_safe
+def serve_media(request, path):
+    """
+    Отдаёт файл из MEDIA_ROOT с поддержкой Range и условных запросов.
+
+    Файл передаётся потоком через FileResponse, а при MEDIA_SENDFILE —
+    отдаётся веб-серверу заголовком X-Sendfile или X-Accel-Redirect.
+    """
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        stat_result = os.stat(full_path)
+    except (SuspiciousFileOperation, OSError, ValueError):
+        raise Http404
+    if not stat.S_ISREG(stat_result.st_mode):
+        raise Http404
+    size, mtime = stat_result.st_size, stat_result.st_mtime
+    etag = '"{:x}-{:x}"'.format(int(mtime * 1000), size)
+    content_type = (
+        mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+    )
+
+    def set_headers(response):
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(mtime)
+        response['Cache-Control'] = 'public, max-age={}, immutable'.format(
+            settings.MEDIA_CACHE_MAX_AGE
+        )
+        response['Accept-Ranges'] = 'bytes'
+        return response
+
+    not_modified = get_conditional_response(
+        request, etag=etag, last_modified=int(mtime)
+    )
+    if not_modified is not None:
+        return set_headers(not_modified)
+
+    response = _sendfile_response(path, full_path, content_type)
+    if response is None:
+        response = _file_response(
+            request, full_path, size, etag, mtime, content_type
+        )
+    return set_headers(response)
+
+
+def _sendfile_response(path, full_path, content_type):
+    if settings.MEDIA_SENDFILE == 'x-sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = full_path
+        return response
+    if settings.MEDIA_SENDFILE == 'x-accel-redirect':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_PREFIX + path
+        return response
+    return None
+
+
+def _file_response(request, full_path, size, etag, mtime, content_type):
+    byte_range = None
+    if _range_applies(request, etag, mtime):
+        try:
+            byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+        except Unsatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+    file = open(full_path, 'rb')
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type)
+        response['Content-Length'] = size
+        return response
+    start, end = byte_range
+    response = FileResponse(
+        RangeFile(file, start, end - start + 1),
+        status=206,
+        content_type=content_type,
+    )
+    response['Content-Length'] = end - start + 1
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return response
@@ -0,0 +1,108 @@
+"""
+Прогрев процесса после деплоя: шаблоны, соединение с базой и страницы.
+
+Страницы запрашиваются через тот же WSGIHandler, что обслуживает сайт,
+с хостом из SITE_URL, поэтому в кеш попадают ровно те ответы, которые
+отдадут пользователям, в том числе копии для каждого поддерживаемого
+сжатия.
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import close_old_connections, connection
+from django.template import engines
+
+from .middleware import COMPRESSORS
+
+
+def warm_database():
+    """Открывает соединение с базой и загружает её схему."""
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+    connection.introspection.table_names()
+
+
+def warm_templates():
+    """Компилирует шаблоны проекта в кеш загрузчика шаблонов."""
+    loaded = 0
+    for engine in engines.all():
+        for directory in getattr(engine, 'dirs', ()):
+            for root, _, files in os.walk(directory):
+                for filename in files:
+                    if not filename.endswith('.html'):
+                        continue
+                    name = os.path.relpath(
+                        os.path.join(root, filename), directory
+                    )
+                    engine.get_template(name.replace(os.sep, '/'))
+                    loaded += 1
+    return loaded
+
+
+def _request_environ(path, encoding):
+    host = urlsplit(settings.SITE_URL).hostname
+    return {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path.split('?')[0],
+        'QUERY_STRING': path.partition('?')[2],
+        'SCRIPT_NAME': '',
+        'SERVER_NAME': host,
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': host,
+        'HTTP_ACCEPT_ENCODING': encoding,
+        'REMOTE_ADDR': '127.0.0.1',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': BytesIO(),
+        'wsgi.errors': BytesIO(),
+        'wsgi.multiprocess': True,
+        'wsgi.multithread': True,
+        'wsgi.run_once': False,
+    }
+
+
+def warm_page(handler, path):
+    """Запрашивает страницу для каждого сжатия; возвращает (статус, мс)."""
+    started = time.monotonic()
+    status = None
+    try:
+        for encoding in ('',) + tuple(COMPRESSORS):
+            response = handler(
+                _request_environ(path, encoding), lambda *args: None
+            )
+            status = response.status_code
+            response.close()
+    finally:
+        close_old_connections()
+        connection.close()
+    return status, (time.monotonic() - started) * 1000
+
+
+def _run_job(job):
+    try:
+        job()
+    finally:
+        connection.close()
+
+
+def warm_pages(paths, workers=4, jobs=()):
+    """
+    Параллельно прогревает страницы paths и выполняет функции jobs.
+
+    Возвращает словарь {path: (статус, мс)} для страниц.
+    """
+    handler = WSGIHandler()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pages = {
+            path: executor.submit(warm_page, handler, path)
+            for path in paths
+        }
+        for future in [executor.submit(_run_job, job) for job in jobs]:
+            future.result()
+    return {path: future.result() for path, future in pages.items()}
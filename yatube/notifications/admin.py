@@ -0,0 +1,11 @@
+from django.contrib import admin
+from .models import EmailOptOut
+
+
+class EmailOptOutAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'user', 'created')
+    raw_id_fields = ('user',)
+    empty_value_display = '-пусто-'
+
+
+admin.site.register(EmailOptOut, EmailOptOutAdmin)
@@ -0,0 +1,10 @@
+from .inbox import unread_count
+
+
+def unread_notifications(request):
+    """Добавляет число непрочитанных уведомлений для шапки."""
+    if not request.user.is_authenticated:
+        return {}
+    return {
+        'unread_notifications': unread_count(request.user)
+    }
@@ -0,0 +1,69 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+
+from core.locks import is_shared_cache
+
+from .models import Notification
+
+
+UNREAD_KEY = 'notifications:unread:{}'
+
+
+def notify_comment(comment):
+    """
+    Сообщает автору поста о новом комментарии.
+
+    Пока уведомление о комментариях к посту не прочитано, новые
+    комментарии увеличивают его счётчик, а не создают новые записи.
+    """
+    post = comment.post
+    if comment.author_id == post.author_id:
+        return
+    coalesced = Notification.objects.filter(
+        recipient_id=post.author_id,
+        post=post,
+        kind=Notification.COMMENT,
+        is_read=False,
+    ).update(count=F('count') + 1, updated=timezone.now())
+    if coalesced:
+        return
+    Notification.objects.create(
+        recipient_id=post.author_id,
+        post=post,
+        kind=Notification.COMMENT,
+    )
+    try:
+        cache.incr(UNREAD_KEY.format(post.author_id))
+    except ValueError:
+        pass
+
+
+def unread_count(user):
+    """Число непрочитанных уведомлений; база читается только при промахе
+    кеша. Счётчик меняют и другие воркеры, поэтому без общего кеша он
+    всегда считается в базе."""
+    if not is_shared_cache():
+        return Notification.objects.filter(
+            recipient=user, is_read=False
+        ).count()
+    key = UNREAD_KEY.format(user.pk)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(
+            recipient=user, is_read=False
+        ).count()
+        cache.set(key, count, settings.NOTIFICATIONS_CACHE_TIME)
+    return count
+
+
+def mark_read(user, notifications):
+    ids = [
+        notification.id for notification in notifications
+        if not notification.is_read
+    ]
+    if not ids:
+        return
+    Notification.objects.filter(id__in=ids).update(is_read=True)
+    cache.delete(UNREAD_KEY.format(user.pk))
@@ -0,0 +1,41 @@
+# Generated by Django 2.2.16 on 2026-10-19 19:39
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_group_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('notifications', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('comment', 'Комментарий')], default='comment', max_length=20, verbose_name='Тип')),
+                ('count', models.PositiveIntegerField(default=1, verbose_name='Количество событий')),
+                ('is_read', models.BooleanField(default=False, verbose_name='Прочитано')),
+                ('updated', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Последнее событие')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to='posts.Post')),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-updated', '-id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient', '-updated', '-id'], name='notificatio_recipie_67459e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient', 'post', 'kind', 'is_read'], name='notificatio_recipie_d92b09_idx'),
+        ),
+    ]
@@ -0,0 +1,85 @@
+from django.db import models
+from django.utils import timezone
+
+from posts.models import Post, User
+
+
+class EmailOptOut(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='email_opt_out',
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата отписки',
+    )
+
+    def __str__(self):
+        return self.user.username
+
+
+class DigestEntry(models.Model):
+    recipient = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='digest_entries',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='digest_entries',
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата добавления',
+    )
+
+    def __str__(self):
+        return str(self.post)
+
+
+class Notification(models.Model):
+    COMMENT = 'comment'
+    KIND_CHOICES = (
+        (COMMENT, 'Комментарий'),
+    )
+
+    recipient = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+    )
+    kind = models.CharField(
+        max_length=20,
+        choices=KIND_CHOICES,
+        default=COMMENT,
+        verbose_name='Тип',
+    )
+    count = models.PositiveIntegerField(
+        default=1,
+        verbose_name='Количество событий',
+    )
+    is_read = models.BooleanField(
+        default=False,
+        verbose_name='Прочитано',
+    )
+    updated = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Последнее событие',
+    )
+
+    class Meta:
+        ordering = ['-updated', '-id']
+        indexes = [
+            models.Index(fields=['recipient', '-updated', '-id']),
+            models.Index(fields=['recipient', 'post', 'kind', 'is_read']),
+        ]
+
+    def __str__(self):
+        return f'{self.kind}: {self.count}'
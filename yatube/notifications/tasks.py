@@ -0,0 +1,114 @@
+import time
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Max
+from django.urls import reverse
+
+from core.tasks import task
+from posts.models import Follow, Post
+from .models import DigestEntry
+
+
+FAN_OUT_BATCH_SIZE = 1000
+DIGEST_SUBJECT = 'Новые посты авторов, на которых вы подписаны'
+
+
+def schedule_digest():
+    """Планирует одну рассылку дайджестов на конец текущего периода."""
+    period = settings.EMAIL_DIGEST_PERIOD
+    now = time.time()
+    window = int(now // period)
+    send_digests.enqueue(
+        countdown=(window + 1) * period - now,
+        idempotency_key=f'email-digest:{window}',
+    )
+
+
+@task()
+def notify_followers(post_id):
+    """Добавляет новый пост в дайджесты подписчиков автора."""
+    post = Post.objects.filter(id=post_id).only('author_id').first()
+    if post is None:
+        return
+    recipients = Follow.objects.filter(
+        author_id=post.author_id,
+        user__email_opt_out__isnull=True,
+    ).exclude(user__email='').values_list('user_id', flat=True)
+    batch = []
+    for recipient_id in recipients.iterator(chunk_size=FAN_OUT_BATCH_SIZE):
+        batch.append(DigestEntry(recipient_id=recipient_id, post_id=post_id))
+        if len(batch) == FAN_OUT_BATCH_SIZE:
+            DigestEntry.objects.bulk_create(batch)
+            batch = []
+    DigestEntry.objects.bulk_create(batch)
+    schedule_digest()
+
+
+def build_digest(recipient, posts):
+    lines = [
+        '{}: {}\n{}{}'.format(
+            post.author.get_full_name() or post.author.username,
+            post.text[:200],
+            settings.SITE_URL,
+            reverse('posts:post_detail', kwargs={'post_id': post.id}),
+        )
+        for post in posts
+    ]
+    return EmailMessage(
+        subject=DIGEST_SUBJECT,
+        body='\n\n'.join(lines),
+        to=[recipient.email],
+    )
+
+
+def _send_batch(connection, messages, last_id):
+    """Отправляет пачку писем {recipient_id: message} и сразу удаляет
+    их записи, чтобы повтор задачи после сбоя не слал их снова."""
+    if not messages:
+        return
+    connection.send_messages(list(messages.values()))
+    DigestEntry.objects.filter(
+        id__lte=last_id, recipient_id__in=list(messages)
+    ).delete()
+
+
+@task()
+def send_digests():
+    """
+    Рассылает накопленные дайджесты.
+
+    Письма собираются по одному на получателя и отправляются пачками
+    через одно открытое соединение. Записи получателей удаляются после
+    отправки каждой пачки, поэтому при сбое посреди рассылки повтор
+    задачи продолжит с неотправленных.
+    """
+    last_id = DigestEntry.objects.aggregate(last=Max('id'))['last']
+    if last_id is None:
+        return
+    entries = DigestEntry.objects.filter(
+        id__lte=last_id,
+        recipient__email_opt_out__isnull=True,
+    ).select_related(
+        'recipient', 'post', 'post__author'
+    ).order_by('recipient_id', 'id')
+    connection = get_connection()
+    connection.open()
+    try:
+        messages, recipient, posts = {}, None, []
+        for entry in entries.iterator():
+            if recipient is not None and entry.recipient_id != recipient.id:
+                messages[recipient.id] = build_digest(recipient, posts)
+                posts = []
+                if len(messages) == settings.EMAIL_BATCH_SIZE:
+                    _send_batch(connection, messages, last_id)
+                    messages = {}
+            recipient = entry.recipient
+            posts.append(entry.post)
+        if recipient is not None:
+            messages[recipient.id] = build_digest(recipient, posts)
+        _send_batch(connection, messages, last_id)
+    finally:
+        connection.close()
+    # Остались записи получателей, отписавшихся от рассылки.
+    DigestEntry.objects.filter(id__lte=last_id).delete()
@@ -0,0 +1,173 @@
+from unittest import mock
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import tasks
+from core.models import Task
+from notifications.inbox import unread_count
+from notifications.models import DigestEntry, EmailOptOut, Notification
+from notifications.tasks import send_digests
+from posts.models import Follow, Post, User
+
+
+class EmailDigestTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(
+            username='reader', email='reader@example.com')
+        cls.opted_out = User.objects.create_user(
+            username='opted_out', email='opted_out@example.com')
+        EmailOptOut.objects.create(user=cls.opted_out)
+        for user in (cls.reader, cls.opted_out):
+            Follow.objects.create(user=user, author=cls.author)
+
+    def setUp(self):
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def test_new_posts_grouped_into_one_digest(self):
+        """Новые посты попадают подписчикам одним письмом."""
+        for text in ('Первый пост', 'Второй пост'):
+            self.author_client.post(
+                reverse('posts:post_create'), data={'text': text})
+        self.assertEqual(DigestEntry.objects.count(), 0)
+        tasks.run_pending()
+        self.assertEqual(DigestEntry.objects.count(), 2)
+        self.assertEqual(
+            Task.objects.filter(name='notifications.tasks.send_digests',
+                                status=Task.QUEUED).count(), 1)
+        send_digests()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['reader@example.com'])
+        self.assertIn('Первый пост', mail.outbox[0].body)
+        self.assertIn('Второй пост', mail.outbox[0].body)
+        self.assertEqual(DigestEntry.objects.count(), 0)
+
+    @override_settings(EMAIL_BATCH_SIZE=1)
+    def test_retry_after_failure_skips_sent_digests(self):
+        """Повтор упавшей рассылки не шлёт письма повторно."""
+        second = User.objects.create_user(
+            username='second', email='second@example.com')
+        Follow.objects.create(user=second, author=self.author)
+        self.author_client.post(
+            reverse('posts:post_create'), data={'text': 'Пост'})
+        tasks.run_pending()
+        send_messages = EmailBackend.send_messages
+        calls = []
+
+        def fail_second_batch(backend, messages):
+            calls.append(messages)
+            if len(calls) == 2:
+                raise ConnectionError('SMTP недоступен')
+            return send_messages(backend, messages)
+
+        with mock.patch.object(EmailBackend, 'send_messages',
+                               fail_second_batch):
+            with self.assertRaises(ConnectionError):
+                send_digests()
+        self.assertEqual([m.to for m in mail.outbox], [['reader@example.com']])
+        send_digests()
+        self.assertEqual(
+            [m.to for m in mail.outbox],
+            [['reader@example.com'], ['second@example.com']])
+        self.assertEqual(DigestEntry.objects.count(), 0)
+
+    def test_user_can_toggle_opt_out(self):
+        """Пользователь может отписаться от рассылки и вернуться."""
+        client = Client()
+        client.force_login(self.reader)
+        client.post(reverse('notifications:email_settings'))
+        self.assertTrue(
+            EmailOptOut.objects.filter(user=self.reader).exists())
+        client.post(reverse('notifications:email_settings'))
+        self.assertFalse(
+            EmailOptOut.objects.filter(user=self.reader).exists())
+
+
+class CommentNotificationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.commenter = User.objects.create_user(username='commenter')
+        cls.post = Post.objects.create(text='Тестовый пост', author=cls.author)
+        cls.other_post = Post.objects.create(
+            text='Другой пост', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.commenter_client = Client()
+        self.commenter_client.force_login(self.commenter)
+
+    def comment(self, post, client=None):
+        (client or self.commenter_client).post(
+            reverse('posts:add_comment', kwargs={'post_id': post.id}),
+            data={'text': 'Комментарий'})
+
+    def test_comments_coalesced_into_one_notification(self):
+        """Серия комментариев к посту даёт одно уведомление."""
+        for _ in range(3):
+            self.comment(self.post)
+        self.comment(self.post, client=self.author_client)
+        notification = Notification.objects.get()
+        self.assertEqual(notification.recipient, self.author)
+        self.assertEqual(notification.count, 3)
+
+    @mock.patch('notifications.inbox.is_shared_cache', return_value=True)
+    def test_unread_count_read_from_cache(self, is_shared_cache):
+        """Счётчик в шапке берётся из кеша без запросов к базе."""
+        self.comment(self.post)
+        self.comment(self.other_post)
+        self.assertEqual(unread_count(self.author), 2)
+        self.comment(self.post)
+        with self.assertNumQueries(0):
+            self.assertEqual(unread_count(self.author), 2)
+
+    def test_unread_count_without_shared_cache(self):
+        """Без общего кеша счётчик видит изменения других воркеров."""
+        self.comment(self.post)
+        self.assertEqual(unread_count(self.author), 1)
+        Notification.objects.update(is_read=True)
+        self.assertEqual(unread_count(self.author), 0)
+
+    def test_cached_index_does_not_leak_badge(self):
+        """Закешированная главная не отдаёт чужую шапку и счётчик."""
+        self.comment(self.post)
+        response = self.author_client.get(reverse('posts:index'))
+        self.assertEqual(response.context['unread_notifications'], 1)
+        response = Client().get(reverse('posts:index'))
+        self.assertNotContains(response, 'badge bg-danger')
+        self.assertNotContains(response, 'Выйти')
+
+    def test_inbox_marks_notifications_read(self):
+        """Просмотр уведомлений сбрасывает счётчик непрочитанных."""
+        self.comment(self.post)
+        response = self.author_client.get(reverse('notifications:inbox'))
+        self.assertEqual(len(response.context['notifications']), 1)
+        self.assertEqual(unread_count(self.author), 0)
+        self.comment(self.post)
+        self.assertEqual(Notification.objects.count(), 2)
+
+    @override_settings(NOTIFICATIONS_AMOUNT=1)
+    def test_inbox_keyset_pagination(self):
+        """Уведомления листаются по курсору."""
+        self.comment(self.post)
+        self.comment(self.other_post)
+        response = self.author_client.get(reverse('notifications:inbox'))
+        first_page = response.context['notifications']
+        response = self.author_client.get(
+            reverse('notifications:inbox'),
+            {'before': response.context['next_cursor']})
+        second_page = response.context['notifications']
+        self.assertEqual(
+            [n.post for n in first_page + second_page],
+            [self.other_post, self.post])
+        self.assertIsNone(response.context['next_cursor'])
@@ -0,0 +1,11 @@
+from django.urls import path
+from . import views
+
+
+app_name = 'notifications'
+
+
+urlpatterns = [
+    path('', views.inbox, name='inbox'),
+    path('email/', views.email_settings, name='email_settings'),
+]
@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.shortcuts import redirect, render
+from django.utils.dateparse import parse_datetime
+
+from core.pagination import keyset_page
+from .inbox import mark_read
+from .models import EmailOptOut
+
+
+@login_required
+def email_settings(request):
+    opted_out = EmailOptOut.objects.filter(user=request.user).exists()
+    if request.method == 'POST':
+        if opted_out:
+            EmailOptOut.objects.filter(user=request.user).delete()
+        else:
+            EmailOptOut.objects.create(user=request.user)
+        return redirect('notifications:email_settings')
+    context = {
+        'opted_out': opted_out,
+    }
+    return render(request, 'notifications/email_settings.html', context)
+
+
+def _parse_cursor(value):
+    updated, _, notification_id = (value or '').rpartition('|')
+    updated = parse_datetime(updated) if updated else None
+    if updated is None or not notification_id.isdigit():
+        return None
+    return updated, int(notification_id)
+
+
+@login_required
+def inbox(request):
+    notifications, next_cursor = keyset_page(
+        request.user.notifications.select_related('post'),
+        ('-updated', '-id'),
+        _parse_cursor(request.GET.get('before')),
+        settings.NOTIFICATIONS_AMOUNT,
+    )
+    mark_read(request.user, notifications)
+    if next_cursor is not None:
+        updated, notification_id = next_cursor
+        next_cursor = f'{updated.isoformat()}|{notification_id}'
+    context = {
+        'notifications': notifications,
+        'next_cursor': next_cursor,
+    }
+    return render(request, 'notifications/inbox.html', context)
@@ -1,16 +1,165 @@
-from django.contrib import admin
-from .models import Post, Group, Comment, Follow
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.contrib.auth.admin import UserAdmin
+from core.pagination import CachedCountPaginator
+from .models import Post, Group, Comment, Follow, User, BulkJob
+from .tasks import schedule_user_deletion, start_bulk_job
+
+
+class PostActionForm(ActionForm):
+    group = forms.SlugField(
+        required=False,
+        label='Слаг группы',
+    )
 
 
 class PostAdmin(admin.ModelAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group')
-    list_editable = ('group',)
+    list_select_related = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
+    date_hierarchy = 'pub_date'
+    autocomplete_fields = ('author', 'group')
+    show_full_result_count = False
+    paginator = CachedCountPaginator
+    empty_value_display = '-пусто-'
+    action_form = PostActionForm
+    actions = (
+        'reassign_group_in_background',
+        'delete_in_background',
+        'purge_images_in_background',
+    )
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    def start_job(self, request, queryset, action, group=None):
+        job = start_bulk_job(action, queryset, group, request.user)
+        self.message_user(
+            request,
+            f'Задача «{job.get_action_display()}» для {job.total} постов '
+            f'запущена, прогресс — в разделе массовых действий.'
+        )
+
+    def reassign_group_in_background(self, request, queryset):
+        group = Group.objects.filter(
+            slug=request.POST.get('group')
+        ).first()
+        if group is None:
+            self.message_user(
+                request, 'Укажите слаг существующей группы.', messages.ERROR
+            )
+            return
+        self.start_job(request, queryset, BulkJob.REASSIGN_GROUP, group)
+    reassign_group_in_background.short_description = (
+        'Перенести в группу (в фоне)'
+    )
+
+    def delete_in_background(self, request, queryset):
+        self.start_job(request, queryset, BulkJob.DELETE)
+    delete_in_background.short_description = 'Удалить посты (в фоне)'
+
+    def purge_images_in_background(self, request, queryset):
+        self.start_job(request, queryset, BulkJob.PURGE_IMAGES)
+    purge_images_in_background.short_description = (
+        'Удалить картинки постов (в фоне)'
+    )
+
+
+class BulkJobAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk', 'action', 'group', 'progress', 'status', 'created_by',
+        'created', 'updated',
+    )
+    list_filter = ('status', 'action')
+    fields = list_display[1:]
+    readonly_fields = fields
+    empty_value_display = '-пусто-'
+
+    def progress(self, job):
+        if not job.total:
+            return '100%'
+        percent = job.processed * 100 // job.total
+        return f'{job.processed}/{job.total} ({percent}%)'
+    progress.short_description = 'Прогресс'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+class GroupAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'title', 'slug', 'posts_count', 'last_activity')
+    search_fields = ('title', 'slug')
+    prepopulated_fields = {'slug': ('title',)}
+    ordering = ('title',)
+    show_full_result_count = False
+    paginator = CachedCountPaginator
+    empty_value_display = '-пусто-'
+
+
+class CommentAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'text', 'created', 'author', 'post')
+    list_select_related = ('author', 'post')
+    search_fields = ('text',)
+    date_hierarchy = 'created'
+    autocomplete_fields = ('author', 'post')
+    show_full_result_count = False
+    paginator = CachedCountPaginator
+    empty_value_display = '-пусто-'
+
+
+class FollowAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'user', 'author')
+    list_select_related = ('user', 'author')
+    search_fields = ('user__username', 'author__username')
+    autocomplete_fields = ('user', 'author')
+    show_full_result_count = False
+    paginator = CachedCountPaginator
     empty_value_display = '-пусто-'
 
 
+class YatubeUserAdmin(UserAdmin):
+    actions = ('delete_in_background',)
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    def get_deleted_objects(self, objs, request):
+        # Контент удаляет фоновая задача, поэтому страница подтверждения
+        # не собирает каскад всех постов, комментариев и подписок.
+        return [str(obj) for obj in objs], {}, set(), []
+
+    def delete_model(self, request, obj):
+        schedule_user_deletion(obj)
+
+    def delete_queryset(self, request, queryset):
+        for user in queryset:
+            schedule_user_deletion(user)
+
+    def delete_in_background(self, request, queryset):
+        users = queryset.filter(is_active=True)
+        for user in users:
+            schedule_user_deletion(user)
+        self.message_user(
+            request, f'Поставлено в очередь на удаление: {len(users)}.'
+        )
+    delete_in_background.short_description = (
+        'Скрыть и удалить пользователей в фоне'
+    )
+
+
 admin.site.register(Post, PostAdmin)
-admin.site.register(Group)
-admin.site.register(Follow)
-admin.site.register(Comment)
+admin.site.register(Group, GroupAdmin)
+admin.site.register(Follow, FollowAdmin)
+admin.site.register(Comment, CommentAdmin)
+admin.site.register(BulkJob, BulkJobAdmin)
+admin.site.unregister(User)
+admin.site.register(User, YatubeUserAdmin)
@@ -0,0 +1,151 @@
+"""
+Перенос старых постов в архивные таблицы.
+
+Горячая таблица Post и её индексы хранят только посты моложе
+ARCHIVE_AFTER_DAYS; более старые посты вместе с комментариями переезжают в
+ArchivedPost и ArchivedComment с теми же id, а история правок — в
+ArchivedPostRevision. post_detail, profile и история правок читают архив
+прозрачно, лента и группы показывают только горячие посты.
+
+Уведомления о комментариях и записи дайджеста к архивируемому посту
+удаляются вместе с ним: к этому времени дайджест давно разослан, а
+уведомлениям годичной давности в ленте уведомлений не место.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from core.pagination import cached_count, forget_count
+
+from . import images
+from .models import (
+    ArchivedComment, ArchivedPost, ArchivedPostRevision, Comment, Post,
+    PostRevision,
+)
+from .signals import group_counters_suspended
+
+
+def archive_cutoff(days=None):
+    if days is None:
+        days = settings.ARCHIVE_AFTER_DAYS
+    return timezone.now() - timedelta(days=days)
+
+
+def archive_batch(before, size):
+    """Переносит в архив до size постов старше before; возвращает число."""
+    with transaction.atomic():
+        posts = list(Post.objects.filter(pub_date__lt=before).order_by(
+            'pub_date'
+        )[:size])
+        if not posts:
+            return 0
+        ids = [post.id for post in posts]
+        ArchivedPost.objects.bulk_create([
+            ArchivedPost(
+                id=post.id,
+                text=post.text,
+                text_html=post.text_html,
+                text_html_version=post.text_html_version,
+                pub_date=post.pub_date,
+                author_id=post.author_id,
+                group_id=post.group_id,
+                image=post.image.name,
+                **{
+                    field: getattr(post, field)
+                    for field in images.METADATA_FIELDS
+                },
+            )
+            for post in posts
+        ])
+        ArchivedComment.objects.bulk_create([
+            ArchivedComment(
+                id=comment.id,
+                post_id=comment.post_id,
+                author_id=comment.author_id,
+                text=comment.text,
+                created=comment.created,
+            )
+            for comment in Comment.objects.filter(post_id__in=ids)
+        ])
+        ArchivedPostRevision.objects.bulk_create([
+            ArchivedPostRevision(
+                post_id=revision.post_id,
+                number=revision.number,
+                is_snapshot=revision.is_snapshot,
+                data=revision.data,
+                created=revision.created,
+            )
+            for revision in PostRevision.objects.filter(post_id__in=ids)
+        ])
+        # Пост остаётся в группе и с той же картинкой, поэтому счётчики
+        # групп и ссылки на файлы не меняются.
+        with group_counters_suspended(), images.refs_suspended():
+            Post.objects.filter(id__in=ids).delete()
+    return len(posts)
+
+
+def archive_posts(before, size=None):
+    """Переносит в архив все посты старше before короткими транзакциями."""
+    size = size or settings.ARCHIVE_BATCH_SIZE
+    total = 0
+    while True:
+        moved = archive_batch(before, size)
+        if not moved:
+            return total
+        total += moved
+
+
+def get_post(post_id, **filters):
+    """Возвращает горячий или архивный пост с id либо None."""
+    post = Post.objects.filter(id=post_id, **filters).first()
+    if post is None:
+        post = ArchivedPost.objects.filter(id=post_id, **filters).first()
+    return post
+
+
+def is_archived(post):
+    return isinstance(post, ArchivedPost)
+
+
+class PostHistory:
+    """
+    Посты из Post и ArchivedPost как одна последовательность для Paginator.
+
+    Все горячие посты новее архивных, поэтому порядок '-pub_date'
+    сохраняется, если сначала идут строки Post, а затем ArchivedPost.
+    Срез выполняет не больше двух запросов с LIMIT/OFFSET. count() берёт
+    оба счётчика из кеша (core.pagination.cached_count), а точное число
+    горячих постов считается, только если срез целиком попал в архив.
+    """
+
+    def __init__(self, hot, archived):
+        self.hot = hot
+        self.archived = archived
+
+    def count(self):
+        return cached_count(self.hot) + cached_count(self.archived)
+
+    def forget_count(self):
+        forget_count(self.hot)
+        forget_count(self.archived)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start, stop = index.start or 0, index.stop
+        items = list(self.hot[start:stop])
+        if len(items) == stop - start:
+            return items
+        if items or not start:
+            hot_count = start + len(items)
+        else:
+            hot_count = self.hot.count()
+        items.extend(self.archived[
+            max(start - hot_count, 0):stop - hot_count
+        ])
+        return items
@@ -0,0 +1,113 @@
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+from core.locks import is_shared_cache
+
+from .models import Follow
+
+
+FOLLOWEES_KEY = 'follow_graph:followees:{}'
+TYPECODE = 'q'
+
+
+def _key(user_id):
+    return FOLLOWEES_KEY.format(user_id)
+
+
+def _to_array(data):
+    followees = array(TYPECODE)
+    followees.frombytes(data)
+    return followees
+
+
+def _contains(followees, author_id):
+    index = bisect_left(followees, author_id)
+    return index < len(followees) and followees[index] == author_id
+
+
+def get_followees(user_id):
+    """Возвращает отсортированный массив id авторов, на которых подписан
+    пользователь.
+
+    Подписки меняются в любом воркере, поэтому кешируются только в общем
+    кеше; с LocMemCache массив каждый раз читается из базы."""
+    shared = is_shared_cache()
+    if shared:
+        data = cache.get(_key(user_id))
+        if data is not None:
+            return _to_array(data)
+    followees = array(TYPECODE, Follow.objects.filter(
+        user_id=user_id
+    ).order_by('author_id').values_list('author_id', flat=True))
+    if not shared:
+        return followees
+    cache.set(
+        _key(user_id), followees.tobytes(), settings.FOLLOW_GRAPH_CACHE_TIME
+    )
+    return followees
+
+
+def is_following(user_id, author_id):
+    return _contains(get_followees(user_id), author_id)
+
+
+def following_authors(user_id, author_ids):
+    """Возвращает множество авторов из author_ids, на которых подписан
+    пользователь, за одно чтение из кеша."""
+    followees = get_followees(user_id)
+    return {
+        author_id for author_id in author_ids
+        if _contains(followees, author_id)
+    }
+
+
+def _update_cached(user_id, update):
+    data = cache.get(_key(user_id))
+    if data is None:
+        return
+    followees = array(TYPECODE, sorted(update(set(_to_array(data)))))
+    cache.set(
+        _key(user_id), followees.tobytes(), settings.FOLLOW_GRAPH_CACHE_TIME
+    )
+
+
+def follow(user_id, author_ids):
+    """Подписывает пользователя на авторов одним INSERT OR IGNORE.
+
+    Повторная подписка и подписка на себя ничего не меняют."""
+    author_ids = {
+        author_id for author_id in author_ids if author_id != user_id
+    }
+    Follow.objects.bulk_create(
+        [Follow(user_id=user_id, author_id=author_id)
+         for author_id in author_ids],
+        ignore_conflicts=True,
+    )
+    _update_cached(user_id, lambda followees: followees | author_ids)
+
+
+def unfollow(user_id, author_ids):
+    """Отписывает пользователя от авторов одним DELETE.
+
+    QuerySet.delete() выбрал бы строки ради сигналов post_delete, а кеш
+    здесь обновляется и без них, поэтому запрос пишется напрямую."""
+    author_ids = set(author_ids)
+    if author_ids:
+        meta = Follow._meta
+        sql = 'DELETE FROM {} WHERE {} = %s AND {} IN ({})'.format(
+            connection.ops.quote_name(meta.db_table),
+            connection.ops.quote_name(meta.get_field('user').column),
+            connection.ops.quote_name(meta.get_field('author').column),
+            ', '.join(['%s'] * len(author_ids)),
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [user_id, *author_ids])
+    _update_cached(user_id, lambda followees: followees - author_ids)
+
+
+def forget(user_id):
+    cache.delete(_key(user_id))
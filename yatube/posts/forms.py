@@ -1,4 +1,7 @@
+import re
+
 from django import forms
+from django.conf import settings
 from .models import Post, Comment
 from django.utils.translation import gettext_lazy as _
 
@@ -17,3 +20,31 @@ class CommentForm(forms.ModelForm):
     class Meta:
         model = Comment
         fields = ('text',)
+
+
+class BulkFollowForm(forms.Form):
+    FOLLOW = 'follow'
+    UNFOLLOW = 'unfollow'
+
+    usernames = forms.CharField(
+        widget=forms.Textarea,
+        help_text=_('Имена пользователей через пробел, запятую '
+                    'или с новой строки. ')
+    )
+    action = forms.ChoiceField(
+        choices=((FOLLOW, _('Подписаться')), (UNFOLLOW, _('Отписаться'))),
+        initial=FOLLOW,
+    )
+
+    def clean_usernames(self):
+        usernames = {
+            username for username in
+            re.split(r'[\s,]+', self.cleaned_data['usernames'])
+            if username
+        }
+        if len(usernames) > settings.BULK_FOLLOW_LIMIT:
+            raise forms.ValidationError(
+                _('Не больше %(limit)s пользователей за раз.'),
+                params={'limit': settings.BULK_FOLLOW_LIMIT},
+            )
+        return sorted(usernames)
@@ -0,0 +1,185 @@
+"""
+Учёт ссылок на файлы картинок постов и их метаданные.
+
+Одинаковые загрузки хранятся одним файлом (см. posts.storage), поэтому
+файл и его миниатюры удаляются только когда на него не ссылается ни
+один Post или ArchivedPost. Миниатюры sorl строятся по имени исходника,
+а оно совпадает у дубликатов, так что они переиспользуются сами собой.
+
+Размеры, формат, вес и размытое превью картинки сохраняются в Post при
+загрузке, чтобы шаблоны не открывали файл.
+"""
+import base64
+import logging
+import threading
+from contextlib import contextmanager
+from io import BytesIO
+
+from django.core.exceptions import SuspiciousFileOperation
+from django.db import transaction
+from django.db.models import F
+
+from .models import ImageBlob
+from .storage import image_storage
+
+
+logger = logging.getLogger(__name__)
+_state = threading.local()
+
+
+@contextmanager
+def refs_suspended():
+    """Отключает учёт ссылок, когда имя файла лишь переходит к другой
+    строке, например при архивации поста."""
+    previous = getattr(_state, 'suspended', False)
+    _state.suspended = True
+    try:
+        yield
+    finally:
+        _state.suspended = previous
+
+
+def is_suspended():
+    return getattr(_state, 'suspended', False)
+
+
+def acquire(name):
+    """Добавляет ссылку на файл name."""
+    ImageBlob.objects.bulk_create(
+        [ImageBlob(name=name, refs=0)], ignore_conflicts=True
+    )
+    ImageBlob.objects.filter(name=name).update(refs=F('refs') + 1)
+
+
+def acquire_upload(name):
+    """
+    Берёт ссылку на загружаемый файл до того, как хранилище решит,
+    переиспользовать ли уже лежащий на диске файл.
+
+    Вызывается из ContentAddressedStorage, поэтому ожидающий delete_file
+    видит ссылку и не удаляет файл, который только что переиспользовали.
+    """
+    if not is_suspended():
+        acquire(name)
+
+
+def release(name):
+    """
+    Убирает ссылку на файл name и, если ссылок не осталось, после коммита
+    удаляет файл с миниатюрами. Строка ImageBlob с refs=0 остаётся до
+    удаления: по ней delete_file понимает, что файл никто не занял снова.
+    Файлы, загруженные до учёта ссылок, принадлежали одному посту и
+    получают такую строку здесь же.
+    """
+    tracked = ImageBlob.objects.filter(name=name, refs__gt=0).update(
+        refs=F('refs') - 1
+    )
+    if not tracked:
+        ImageBlob.objects.bulk_create(
+            [ImageBlob(name=name, refs=0)], ignore_conflicts=True
+        )
+    elif not ImageBlob.objects.filter(name=name, refs=0).exists():
+        return
+    transaction.on_commit(lambda: delete_file(name))
+
+
+def delete_file(name):
+    """Удаляет файл картинки вместе с её миниатюрами.
+
+    Вызывается уже после коммита, поэтому ошибка файловой системы не
+    должна ронять запрос: файл останется, об этом будет запись в логе.
+    Файл удаляется только если удалось удалить строку ImageBlob с
+    refs=0. Новая загрузка тех же байтов сначала увеличивает refs в этой
+    строке (см. acquire_upload), поэтому либо удаление её не найдёт, либо
+    запись загрузки дождётся конца транзакции удаления, и хранилище
+    запишет файл заново.
+    """
+    from sorl.thumbnail import delete
+    from sorl.thumbnail.images import ImageFile
+
+    with transaction.atomic():
+        if not ImageBlob.objects.filter(name=name, refs=0).delete()[0]:
+            return
+        try:
+            delete(ImageFile(name, storage=image_storage))
+        except (OSError, SuspiciousFileOperation):
+            logger.warning(
+                'Не удалось удалить картинку %s', name, exc_info=True
+            )
+
+
+PLACEHOLDER_SIZE = 16
+EMPTY_METADATA = {
+    'image_width': None,
+    'image_height': None,
+    'image_size': None,
+    'image_format': '',
+    'image_placeholder': '',
+}
+METADATA_FIELDS = tuple(EMPTY_METADATA)
+
+
+def read_metadata(file):
+    """
+    Читает размеры и формат картинки и строит размытое превью.
+
+    Возвращает словарь полей Post без image_size. Для JPEG декодируется
+    уменьшенная копия (draft), поэтому большие фото не разворачиваются
+    в памяти целиком.
+    """
+    from PIL import Image, ImageFilter
+
+    with Image.open(file) as image:
+        width, height = image.size
+        image_format = (image.format or '').lower()
+        image.draft('RGB', (PLACEHOLDER_SIZE * 8, PLACEHOLDER_SIZE * 8))
+        image.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+        preview = image.convert('RGB').filter(ImageFilter.GaussianBlur(1))
+    buffer = BytesIO()
+    preview.save(buffer, 'JPEG', quality=50)
+    return {
+        'image_width': width,
+        'image_height': height,
+        'image_format': image_format,
+        'image_placeholder': 'data:image/jpeg;base64,' + base64.b64encode(
+            buffer.getvalue()
+        ).decode(),
+    }
+
+
+def read_stored_metadata(name):
+    """Метаданные уже сохранённого файла name или None при ошибке."""
+    try:
+        with image_storage.open(name) as file:
+            metadata = read_metadata(file)
+        metadata['image_size'] = image_storage.size(name)
+    except (OSError, ValueError, SuspiciousFileOperation):
+        logger.warning('Не удалось прочитать картинку %s', name,
+                       exc_info=True)
+        return None
+    return metadata
+
+
+def update_metadata(post):
+    """Заполняет поля метаданных post по его картинке, не сохраняя пост.
+
+    Незагруженный файл читается прямо из формы, до записи в хранилище.
+    """
+    metadata = dict(EMPTY_METADATA)
+    image = post.image
+    if image:
+        try:
+            file = image.file
+            file.seek(0)
+            metadata.update(read_metadata(file))
+            file.seek(0)
+            metadata['image_size'] = image.size
+        except (OSError, ValueError, SuspiciousFileOperation):
+            logger.warning('Не удалось прочитать картинку %s', image.name,
+                           exc_info=True)
+            metadata = dict(EMPTY_METADATA)
+        finally:
+            if image._committed:
+                image.close()
+    for field, value in metadata.items():
+        setattr(post, field, value)
@@ -0,0 +1,30 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import archive
+
+
+class Command(BaseCommand):
+    help = 'Переносит старые посты с комментариями в архивные таблицы.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.ARCHIVE_AFTER_DAYS,
+            help='Архивировать посты старше этого числа дней.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.ARCHIVE_BATCH_SIZE,
+            help='Сколько постов переносить в одной транзакции.',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        moved = archive.archive_posts(
+            archive.archive_cutoff(options['days']), options['batch_size']
+        )
+        self.stdout.write(
+            f'В архив перенесено постов: {moved} '
+            f'за {time.monotonic() - started:.1f} с.'
+        )
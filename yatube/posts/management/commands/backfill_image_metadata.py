@@ -0,0 +1,69 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import images
+from posts.models import ArchivedPost, Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет размеры, формат, вес и превью картинок горячих и '
+        'архивных постов, загруженных до появления этих полей.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=settings.TASKS_WORKERS,
+            help='Число процессов, читающих картинки.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Сколько постов обновлять одним запросом.',
+        )
+
+    def backfill(self, executor, model, batch_size):
+        updated = failed = 0
+        last_id = 0
+        candidates = model.objects.exclude(image='').filter(
+            image_format=''
+        ).order_by('id').only('id', 'image')
+        while True:
+            posts = list(candidates.filter(id__gt=last_id)[:batch_size])
+            if not posts:
+                return updated, failed
+            last_id = posts[-1].id
+            changed = []
+            for post, metadata in zip(posts, executor.map(
+                images.read_stored_metadata,
+                [post.image.name for post in posts],
+            )):
+                if metadata is None:
+                    failed += 1
+                    continue
+                for field, value in metadata.items():
+                    setattr(post, field, value)
+                changed.append(post)
+            model.objects.bulk_update(changed, images.METADATA_FIELDS)
+            updated += len(changed)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        updated = failed = 0
+        with ProcessPoolExecutor(
+            max_workers=options['workers'], initializer=django.setup
+        ) as executor:
+            for model in (Post, ArchivedPost):
+                model_updated, model_failed = self.backfill(
+                    executor, model, options['batch_size']
+                )
+                updated += model_updated
+                failed += model_failed
+        self.stdout.write(
+            f'Метаданные заполнены для {updated} постов, '
+            f'не прочитано картинок: {failed}, '
+            f'за {time.monotonic() - started:.1f} с.'
+        )
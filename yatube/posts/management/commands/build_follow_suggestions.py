@@ -0,0 +1,26 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import suggestions
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рекомендации «кого почитать» по графу подписок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top', type=int, default=settings.FOLLOW_SUGGESTIONS_AMOUNT,
+            help='Сколько авторов сохранять для каждого пользователя.',
+        )
+
+    def handle(self, *args, **options):
+        if suggestions.np is None:
+            raise CommandError('Для расчёта рекомендаций нужны numpy и scipy.')
+        started = time.monotonic()
+        users = suggestions.rebuild_suggestions(options['top'])
+        self.stdout.write(
+            f'Рекомендации построены для {users} пользователей '
+            f'за {time.monotonic() - started:.1f} с.'
+        )
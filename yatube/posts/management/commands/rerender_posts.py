@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import markup
+from posts.models import ArchivedPost, Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Перестраивает HTML текста горячих и архивных постов, размеченных '
+        'старой версией разметки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Перестроить все посты, а не только устаревшие.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Сколько постов обновлять одним запросом.',
+        )
+
+    def rerender(self, model, rerender_all, batch_size):
+        updated = 0
+        last_id = 0
+        candidates = model.objects.order_by('id').only('id', 'text')
+        if not rerender_all:
+            candidates = candidates.exclude(
+                text_html_version=markup.RENDERER_VERSION
+            )
+        while True:
+            posts = list(candidates.filter(id__gt=last_id)[:batch_size])
+            if not posts:
+                return updated
+            last_id = posts[-1].id
+            for post in posts:
+                post.text_html = markup.render(post.text)
+                post.text_html_version = markup.RENDERER_VERSION
+            model.objects.bulk_update(
+                posts, ['text_html', 'text_html_version']
+            )
+            updated += len(posts)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        updated = sum(
+            self.rerender(model, options['all'], options['batch_size'])
+            for model in (Post, ArchivedPost)
+        )
+        self.stdout.write(
+            f'Перестроен HTML {updated} постов '
+            f'за {time.monotonic() - started:.1f} с.'
+        )
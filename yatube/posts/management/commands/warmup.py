@@ -0,0 +1,90 @@
+import time
+from functools import partial
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from django.urls import reverse
+
+from core import warmup
+from posts.models import Group, Post, User
+from posts.tasks import generate_thumbnails
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогревает шаблоны, соединение с базой, популярные страницы и '
+        'миниатюры после деплоя. Отдельным процессом команда полезна '
+        'только с общим для воркеров кешем (Memcached, Redis и т.п.): '
+        'LocMemCache живёт внутри процесса и исчезнет вместе с командой. '
+        'С LocMemCache прогревайте каждый воркер через YATUBE_WARMUP.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pages', type=int, default=settings.WARMUP_PAGES,
+            help='Сколько первых страниц главной ленты прогреть.',
+        )
+        parser.add_argument(
+            '--groups', type=int, default=settings.WARMUP_GROUPS,
+            help='Сколько самых больших групп прогреть.',
+        )
+        parser.add_argument(
+            '--profiles', type=int, default=settings.WARMUP_PROFILES,
+            help='Сколько профилей с наибольшим числом подписчиков прогреть.',
+        )
+        parser.add_argument(
+            '--thumbnails', type=int, default=settings.WARMUP_THUMBNAILS,
+            help='Для скольких последних постов создать миниатюры.',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=settings.WARMUP_WORKERS,
+            help='Число параллельных потоков.',
+        )
+
+    def get_paths(self, options):
+        index = reverse('posts:index')
+        paths = [index] + [
+            f'{index}?page={page}' for page in range(2, options['pages'] + 1)
+        ]
+        paths += [reverse('posts:group_index'), reverse('posts:trending')]
+        for slug in Group.objects.order_by('-posts_count').values_list(
+            'slug', flat=True
+        )[:options['groups']]:
+            paths.append(reverse('posts:group_list', args=[slug]))
+        for username in User.objects.filter(is_active=True).annotate(
+            followers=Count('following')
+        ).order_by('-followers').values_list(
+            'username', flat=True
+        )[:options['profiles']]:
+            paths.append(reverse('posts:profile', args=[username]))
+        return paths
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        backend = settings.CACHES['default']['BACKEND']
+        if backend.endswith('LocMemCache') and options['verbosity'] > 0:
+            self.stderr.write(
+                'Кеш LocMemCache не общий для процессов: прогретые '
+                'страницы останутся только в кеше этой команды.'
+            )
+        warmup.warm_database()
+        templates = warmup.warm_templates()
+        post_ids = list(Post.objects.exclude(image='').values_list(
+            'id', flat=True
+        )[:options['thumbnails']])
+        pages = warmup.warm_pages(
+            self.get_paths(options),
+            workers=options['workers'],
+            jobs=[partial(generate_thumbnails, post_id)
+                  for post_id in post_ids],
+        )
+        if options['verbosity'] > 1:
+            for path, (status, latency) in pages.items():
+                self.stdout.write(f'{status} {latency:7.1f} мс  {path}')
+        if options['verbosity'] > 0:
+            self.stdout.write(
+                f'Прогрето шаблонов: {templates}, страниц: {len(pages)}, '
+                f'миниатюр: {len(post_ids)} '
+                f'за {time.monotonic() - started:.1f} с.'
+            )
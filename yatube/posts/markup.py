@@ -0,0 +1,93 @@
+"""
+Разметка текста постов: упрощённый markdown и ссылки.
+
+Поддерживаются абзацы, переносы строк, списки «- », цитаты «> »,
+`код`, **жирный**, *курсив*, [ссылки](https://...) и голые адреса
+http(s). Весь текст, кроме собственных тегов, экранируется, поэтому
+результат безопасно выводить как есть.
+
+HTML строится один раз при сохранении поста и хранится в
+Post.text_html. При изменении правил разметки нужно увеличить
+RENDERER_VERSION и запустить команду rerender_posts.
+"""
+import re
+
+from django.utils.html import escape
+
+
+RENDERER_VERSION = 2
+
+BLOCK_SEPARATOR = re.compile(r'\n\s*\n')
+LIST_ITEM = re.compile(r'^[-*] +')
+QUOTE_LINE = re.compile(r'^> ?')
+# Скобки внутри адреса допускаются только парные: «(см. https://x.y/a)»
+# не захватывает закрывающую скобку, а https://x.y/a_(b) — целиком.
+URL_CHAR = r'[^\s<>"\'()]'
+PARENS = rf'\({URL_CHAR}*\)'
+INLINE = re.compile(
+    r'`(?P<code>[^`\n]+)`'
+    r'|\[(?P<label>[^\]\n]+)\]'
+    rf'\((?P<href>https?://(?:{URL_CHAR}|{PARENS})+)\)'
+    rf'|(?P<url>https?://(?:{URL_CHAR}|{PARENS})*'
+    rf'(?:[^\s<>"\'().,;:!?\]]|{PARENS}))'
+    r'|\*\*(?P<strong>(?:[^*\n]|\*[^*\s][^*\n]*\*)+?)\*\*'
+    r'|(?<!\w)\*(?P<em>[^*\s](?:[^*\n]*[^*\s])?)\*(?!\w)'
+)
+
+
+def _link(href, label):
+    return '<a href="{}" rel="nofollow noopener">{}</a>'.format(
+        escape(href), label
+    )
+
+
+def render_inline(text):
+    """Размечает одну строку, экранируя всё, кроме своих тегов."""
+    parts = []
+    position = 0
+    for match in INLINE.finditer(text):
+        parts.append(escape(text[position:match.start()]))
+        position = match.end()
+        if match.group('code'):
+            parts.append(f'<code>{escape(match.group("code"))}</code>')
+        elif match.group('href'):
+            parts.append(_link(match.group('href'), escape(
+                match.group('label')
+            )))
+        elif match.group('url'):
+            parts.append(_link(match.group('url'), escape(match.group('url'))))
+        elif match.group('strong'):
+            parts.append(
+                f'<strong>{render_inline(match.group("strong"))}</strong>'
+            )
+        else:
+            parts.append(f'<em>{render_inline(match.group("em"))}</em>')
+    parts.append(escape(text[position:]))
+    return ''.join(parts)
+
+
+def _render_block(block):
+    lines = block.split('\n')
+    if all(LIST_ITEM.match(line) for line in lines):
+        items = ''.join(
+            f'<li>{render_inline(LIST_ITEM.sub("", line))}</li>'
+            for line in lines
+        )
+        return f'<ul>{items}</ul>'
+    if all(QUOTE_LINE.match(line) for line in lines):
+        quote = '<br>'.join(
+            render_inline(QUOTE_LINE.sub('', line)) for line in lines
+        )
+        return f'<blockquote><p>{quote}</p></blockquote>'
+    return '<p>{}</p>'.format('<br>'.join(map(render_inline, lines)))
+
+
+def render(text):
+    """Возвращает безопасный HTML для текста поста."""
+    text = text.replace('\r\n', '\n').replace('\r', '\n').strip()
+    if not text:
+        return ''
+    return '\n'.join(
+        _render_block(block.strip('\n'))
+        for block in BLOCK_SEPARATOR.split(text)
+    )
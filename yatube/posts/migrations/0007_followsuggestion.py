@@ -0,0 +1,25 @@
+# Generated by Django 2.2.16 on 2026-10-19 19:33
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0006_auto_20230121_1324'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FollowSuggestion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('authors', models.TextField(help_text='JSON-список авторов в порядке убывания рейтинга', verbose_name='Рекомендованные авторы')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Дата расчёта')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='follow_suggestion', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 2.2.16 on 2026-10-19 19:35
+
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_group_posts(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    Post = apps.get_model('posts', 'Post')
+    stats = Post.objects.filter(group=OuterRef('pk')).order_by().values(
+        'group'
+    )
+    Group.objects.update(
+        posts_count=Coalesce(Subquery(
+            stats.annotate(count=Count('pk')).values('count')[:1]
+        ), 0),
+        last_activity=Subquery(
+            stats.annotate(last=Max('pub_date')).values('last')[:1]
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_followsuggestion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='last_activity',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Последняя активность'),
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='posts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество постов'),
+        ),
+        migrations.RunPython(count_group_posts, migrations.RunPython.noop),
+    ]
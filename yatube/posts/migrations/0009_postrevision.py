@@ -0,0 +1,30 @@
+# Generated by Django 2.2.16 on 2026-10-19 19:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_group_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostRevision',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField(verbose_name='Номер версии')),
+                ('is_snapshot', models.BooleanField(default=False, verbose_name='Полная копия')),
+                ('data', models.BinaryField(verbose_name='Сжатый текст или разница с предыдущей версией')),
+                ('created', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Дата изменения')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revisions', to='posts.Post')),
+            ],
+            options={
+                'ordering': ['number'],
+                'unique_together': {('post', 'number')},
+            },
+        ),
+    ]
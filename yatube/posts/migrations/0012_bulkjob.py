@@ -0,0 +1,34 @@
+# Generated by Django 2.2.16 on 2026-10-19 19:48
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0011_date_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BulkJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('reassign_group', 'Перенос в группу'), ('delete', 'Удаление'), ('purge_images', 'Удаление картинок')], max_length=20, verbose_name='Действие')),
+                ('post_ids', models.TextField(help_text='JSON-список id выбранных постов', verbose_name='Посты')),
+                ('total', models.PositiveIntegerField(verbose_name='Всего постов')),
+                ('processed', models.PositiveIntegerField(default=0, verbose_name='Обработано')),
+                ('status', models.CharField(choices=[('running', 'Выполняется'), ('done', 'Завершено')], default='running', max_length=10, verbose_name='Статус')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Создано')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Запустил')),
+                ('group', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='posts.Group', verbose_name='Новая группа')),
+            ],
+            options={
+                'ordering': ['-created'],
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 2.2.16 on 2026-10-19 19:56
+
+from collections import Counter
+
+from django.db import migrations, models
+import posts.storage
+
+
+def count_image_refs(apps, schema_editor):
+    ImageBlob = apps.get_model('posts', 'ImageBlob')
+    refs = Counter()
+    for model in ('Post', 'ArchivedPost'):
+        refs.update(apps.get_model('posts', model).objects.exclude(
+            image=''
+        ).values_list('image', flat=True).iterator())
+    ImageBlob.objects.bulk_create(
+        [ImageBlob(name=name, refs=count) for name, count in refs.items()],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_bulkjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageBlob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='Файл')),
+                ('refs', models.PositiveIntegerField(default=0, verbose_name='Ссылок')),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='archivedpost',
+            name='image',
+            field=models.ImageField(blank=True, storage=posts.storage.ContentAddressedStorage(), upload_to='posts/', verbose_name='Картинка'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, storage=posts.storage.ContentAddressedStorage(), upload_to='posts/', verbose_name='Картинка'),
+        ),
+        migrations.RunPython(count_image_refs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 2.2.16 on 2026-10-19 19:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_image_blobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_format',
+            field=models.CharField(blank=True, editable=False, max_length=10, verbose_name='Формат картинки'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Высота картинки'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_placeholder',
+            field=models.TextField(blank=True, editable=False, help_text='data: URI крошечной размытой копии для заглушки', verbose_name='Размытое превью картинки'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_size',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Размер картинки в байтах'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Ширина картинки'),
+        ),
+    ]
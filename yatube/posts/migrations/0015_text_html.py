@@ -0,0 +1,23 @@
+# Generated by Django 2.2.16 on 2026-10-19 20:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_image_metadata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='text_html',
+            field=models.TextField(blank=True, editable=False, help_text='Строится из текста при сохранении, см. posts.markup', verbose_name='Текст поста в HTML'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_html_version',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Версия разметки текста'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 2.2.16 on 2026-10-19 20:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_archived_image_metadata'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedPostRevision',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField(verbose_name='Номер версии')),
+                ('is_snapshot', models.BooleanField(default=False, verbose_name='Полная копия')),
+                ('data', models.BinaryField(verbose_name='Сжатый текст или разница с предыдущей версией')),
+                ('created', models.DateTimeField(verbose_name='Дата изменения')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revisions', to='posts.ArchivedPost')),
+            ],
+            options={
+                'ordering': ['number'],
+                'unique_together': {('post', 'number')},
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 2.2.16 on 2026-10-19 20:19
+
+import json
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def move_post_ids(apps, schema_editor):
+    BulkJob = apps.get_model('posts', 'BulkJob')
+    BulkJobItem = apps.get_model('posts', 'BulkJobItem')
+    for job in BulkJob.objects.filter(status='running').iterator():
+        pending = json.loads(job.post_ids)[job.processed:]
+        BulkJobItem.objects.bulk_create(
+            [BulkJobItem(job_id=job.id, post_id=post_id)
+             for post_id in pending],
+            batch_size=500,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_archived_revisions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BulkJobItem',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('post_id', models.IntegerField(verbose_name='Пост')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='posts.BulkJob')),
+            ],
+            options={
+                'unique_together': {('job', 'post_id')},
+            },
+        ),
+        migrations.RunPython(move_post_ids, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='bulkjob',
+            name='post_ids',
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 2.2.16 on 2026-10-19 20:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_bulkjob_items'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bulkjob',
+            name='last_post_id',
+            field=models.IntegerField(default=0, verbose_name='Последний пост выборки'),
+        ),
+        migrations.AddField(
+            model_name='bulkjob',
+            name='selection',
+            field=models.BinaryField(help_text='Запрос из админки; очищается, когда все посты выборки записаны в BulkJobItem', null=True, verbose_name='Выборка постов'),
+        ),
+        migrations.AddField(
+            model_name='bulkjob',
+            name='selection_cursor',
+            field=models.IntegerField(default=0, verbose_name='Последний записанный пост'),
+        ),
+    ]
@@ -1,6 +1,11 @@
+import json
+
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 
+from .storage import image_storage
+
 
 User = get_user_model()
 
@@ -20,6 +25,17 @@ class Group(models.Model):
         verbose_name='Описание группы',
         help_text='Введите описание группы'
     )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество постов',
+    )
+    last_activity = models.DateTimeField(
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name='Последняя активность',
+    )
 
     def __str__(self):
         return self.title
@@ -30,8 +46,20 @@ class Post(models.Model):
         verbose_name='Текст поста',
         help_text='Введите текст поста'
     )
+    text_html = models.TextField(
+        blank=True,
+        editable=False,
+        verbose_name='Текст поста в HTML',
+        help_text='Строится из текста при сохранении, см. posts.markup'
+    )
+    text_html_version = models.PositiveSmallIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Версия разметки текста',
+    )
     pub_date = models.DateTimeField(
         auto_now_add=True,
+        db_index=True,
         verbose_name='Дата публикации',
     )
     author = models.ForeignKey(
@@ -53,8 +81,39 @@ class Post(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=image_storage,
         blank=True
     )
+    image_width = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name='Ширина картинки',
+    )
+    image_height = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name='Высота картинки',
+    )
+    image_size = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name='Размер картинки в байтах',
+    )
+    image_format = models.CharField(
+        max_length=10,
+        blank=True,
+        editable=False,
+        verbose_name='Формат картинки',
+    )
+    image_placeholder = models.TextField(
+        blank=True,
+        editable=False,
+        verbose_name='Размытое превью картинки',
+        help_text='data: URI крошечной размытой копии для заглушки'
+    )
 
     class Meta:
         ordering = ['-pub_date']
@@ -62,6 +121,14 @@ class Post(models.Model):
     def __str__(self):
         return self.text[:15]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_group_id = instance.__dict__.get('group_id')
+        if 'image' in field_names:
+            instance._loaded_image = instance.__dict__['image'] or ''
+        return instance
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -80,6 +147,7 @@ class Comment(models.Model):
     )
     created = models.DateTimeField(
         auto_now_add=True,
+        db_index=True,
         verbose_name='Дата публикации',
     )
 
@@ -104,3 +172,306 @@ class Follow(models.Model):
 
     def __str__(self):
         return 'followers'
+
+
+class FollowSuggestion(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follow_suggestion',
+    )
+    authors = models.TextField(
+        verbose_name='Рекомендованные авторы',
+        help_text='JSON-список авторов в порядке убывания рейтинга'
+    )
+    updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата расчёта',
+    )
+
+    def get_authors(self):
+        return json.loads(self.authors)
+
+    def __str__(self):
+        return 'suggestions'
+
+
+class PostRevision(models.Model):
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='revisions',
+    )
+    number = models.PositiveIntegerField(
+        verbose_name='Номер версии',
+    )
+    is_snapshot = models.BooleanField(
+        default=False,
+        verbose_name='Полная копия',
+    )
+    data = models.BinaryField(
+        verbose_name='Сжатый текст или разница с предыдущей версией',
+    )
+    created = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Дата изменения',
+    )
+
+    class Meta:
+        ordering = ['number']
+        unique_together = ('post', 'number',)
+
+    def __str__(self):
+        return f'{self.post_id}@{self.number}'
+
+
+class ArchivedPost(models.Model):
+    """Старый пост, перенесённый из Post командой archive_posts.
+
+    Первичный ключ совпадает с id исходного поста, поэтому ссылки на
+    пост продолжают работать после архивации.
+    """
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField(
+        verbose_name='Текст поста',
+    )
+    text_html = models.TextField(
+        blank=True,
+        editable=False,
+        verbose_name='Текст поста в HTML',
+    )
+    text_html_version = models.PositiveSmallIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Версия разметки текста',
+    )
+    pub_date = models.DateTimeField(
+        verbose_name='Дата публикации',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_posts',
+        verbose_name='Автор',
+    )
+    group = models.ForeignKey(
+        Group,
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name='archived_posts',
+        verbose_name='Группа поста',
+    )
+    image = models.ImageField(
+        'Картинка',
+        upload_to='posts/',
+        storage=image_storage,
+        blank=True
+    )
+    image_width = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name='Ширина картинки',
+    )
+    image_height = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name='Высота картинки',
+    )
+    image_size = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name='Размер картинки в байтах',
+    )
+    image_format = models.CharField(
+        max_length=10,
+        blank=True,
+        editable=False,
+        verbose_name='Формат картинки',
+    )
+    image_placeholder = models.TextField(
+        blank=True,
+        editable=False,
+        verbose_name='Размытое превью картинки',
+        help_text='data: URI крошечной размытой копии для заглушки'
+    )
+
+    class Meta:
+        ordering = ['-pub_date']
+
+    def __str__(self):
+        return self.text[:15]
+
+
+class ArchivedComment(models.Model):
+    id = models.IntegerField(primary_key=True)
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        related_name='comments',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_comments',
+    )
+    text = models.TextField(
+        verbose_name='Текст комментария',
+    )
+    created = models.DateTimeField(
+        verbose_name='Дата публикации',
+    )
+
+    def __str__(self):
+        return self.text[:15]
+
+
+class ArchivedPostRevision(models.Model):
+    """Версия архивного поста, перенесённая из PostRevision."""
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        related_name='revisions',
+    )
+    number = models.PositiveIntegerField(
+        verbose_name='Номер версии',
+    )
+    is_snapshot = models.BooleanField(
+        default=False,
+        verbose_name='Полная копия',
+    )
+    data = models.BinaryField(
+        verbose_name='Сжатый текст или разница с предыдущей версией',
+    )
+    created = models.DateTimeField(
+        verbose_name='Дата изменения',
+    )
+
+    class Meta:
+        ordering = ['number']
+        unique_together = ('post', 'number',)
+
+    def __str__(self):
+        return f'{self.post_id}@{self.number}'
+
+
+class BulkJob(models.Model):
+    """Массовое действие над постами из админки, выполняемое пачками."""
+    REASSIGN_GROUP = 'reassign_group'
+    DELETE = 'delete'
+    PURGE_IMAGES = 'purge_images'
+    ACTION_CHOICES = (
+        (REASSIGN_GROUP, 'Перенос в группу'),
+        (DELETE, 'Удаление'),
+        (PURGE_IMAGES, 'Удаление картинок'),
+    )
+    RUNNING = 'running'
+    DONE = 'done'
+    STATUS_CHOICES = (
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Завершено'),
+    )
+
+    action = models.CharField(
+        max_length=20,
+        choices=ACTION_CHOICES,
+        verbose_name='Действие',
+    )
+    group = models.ForeignKey(
+        Group,
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name='+',
+        verbose_name='Новая группа',
+    )
+    total = models.PositiveIntegerField(
+        verbose_name='Всего постов',
+    )
+    processed = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Обработано',
+    )
+    selection = models.BinaryField(
+        null=True,
+        verbose_name='Выборка постов',
+        help_text='Запрос из админки; очищается, когда все посты выборки '
+                  'записаны в BulkJobItem',
+    )
+    selection_cursor = models.IntegerField(
+        default=0,
+        verbose_name='Последний записанный пост',
+    )
+    last_post_id = models.IntegerField(
+        default=0,
+        verbose_name='Последний пост выборки',
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=RUNNING,
+        verbose_name='Статус',
+    )
+    created_by = models.ForeignKey(
+        User,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name='+',
+        verbose_name='Запустил',
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Создано',
+    )
+    updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Обновлено',
+    )
+
+    class Meta:
+        ordering = ['-created']
+
+    def __str__(self):
+        return f'{self.get_action_display()} ({self.processed}/{self.total})'
+
+
+class BulkJobItem(models.Model):
+    """Ещё не обработанный пост массового действия.
+
+    Строка удаляется вместе с обработкой её пачки, поэтому следующая
+    пачка — первые строки задания по индексу (job, post_id).
+    """
+    job = models.ForeignKey(
+        BulkJob,
+        on_delete=models.CASCADE,
+        related_name='items',
+    )
+    post_id = models.IntegerField(
+        verbose_name='Пост',
+    )
+
+    class Meta:
+        unique_together = ('job', 'post_id',)
+
+    def __str__(self):
+        return f'{self.job_id}:{self.post_id}'
+
+
+class ImageBlob(models.Model):
+    """Файл картинки в хранилище по хешу и число постов, ссылающихся
+    на него."""
+    name = models.CharField(
+        max_length=255,
+        unique=True,
+        verbose_name='Файл',
+    )
+    refs = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Ссылок',
+    )
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,92 @@
+import json
+import zlib
+from difflib import SequenceMatcher
+
+from django.conf import settings
+from django.db.models import Max
+
+from .models import PostRevision
+
+
+def encode(value):
+    return zlib.compress(json.dumps(value, ensure_ascii=False).encode())
+
+
+def decode(data):
+    return json.loads(zlib.decompress(bytes(data)).decode())
+
+
+def make_delta(old, new):
+    """
+    Строит разницу между версиями текста.
+
+    Разница — список, где пара [начало, конец] копирует участок старого
+    текста, а строка вставляется как есть. Её размер пропорционален
+    размеру изменения, а не всего текста.
+    """
+    delta = []
+    matcher = SequenceMatcher(None, old, new)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            delta.append([i1, i2])
+        elif j2 > j1:
+            delta.append(new[j1:j2])
+    return delta
+
+
+def apply_delta(old, delta):
+    return ''.join(
+        part if isinstance(part, str) else old[part[0]:part[1]]
+        for part in delta
+    )
+
+
+def snapshot_number(number):
+    """Номер ближайшей полной копии не позже версии number."""
+    every = settings.POST_REVISION_SNAPSHOT_EVERY
+    return (number - 1) // every * every + 1
+
+
+def record_edit(post, old_text, new_text):
+    """
+    Сохраняет правку поста как новую версию.
+
+    При первой правке исходный текст сохраняется полной копией. Далее
+    каждая POST_REVISION_SNAPSHOT_EVERY-я версия хранится целиком,
+    остальные — как разница с предыдущей.
+    """
+    if old_text == new_text:
+        return
+    last = post.revisions.aggregate(last=Max('number'))['last']
+    revisions = []
+    if last is None:
+        last = 1
+        revisions.append(PostRevision(
+            post=post, number=1, is_snapshot=True,
+            data=encode(old_text), created=post.pub_date,
+        ))
+    number = last + 1
+    if snapshot_number(number) == number:
+        revisions.append(PostRevision(
+            post=post, number=number, is_snapshot=True,
+            data=encode(new_text),
+        ))
+    else:
+        revisions.append(PostRevision(
+            post=post, number=number,
+            data=encode(make_delta(old_text, new_text)),
+        ))
+    PostRevision.objects.bulk_create(revisions)
+
+
+def revision_text(post, number):
+    """Восстанавливает текст версии number одним запросом: от ближайшей
+    полной копии применяется не больше SNAPSHOT_EVERY разниц."""
+    revisions = post.revisions.filter(
+        number__gte=snapshot_number(number), number__lte=number
+    ).order_by('number')
+    text = None
+    for revision in revisions:
+        value = decode(revision.data)
+        text = value if revision.is_snapshot else apply_delta(text, value)
+    return text
@@ -0,0 +1,142 @@
+import threading
+from contextlib import contextmanager
+
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import follow_graph, images, markup
+from .models import ArchivedPost, Follow, Group, Post, User
+
+
+_counters = threading.local()
+
+
+@contextmanager
+def group_counters_suspended():
+    """
+    Отключает построчное обновление счётчиков групп в текущем потоке.
+
+    Нужен массовым операциям, которые либо не меняют число постов в
+    группе, либо сами исправляют счётчики одним запросом на группу.
+    """
+    previous = getattr(_counters, 'suspended', False)
+    _counters.suspended = True
+    try:
+        yield
+    finally:
+        _counters.suspended = previous
+
+
+@receiver(post_save, sender=User)
+def reset_new_user_followees(sender, instance, created, **kwargs):
+    if created:
+        follow_graph.forget(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def forget_deleted_user_followees(sender, instance, **kwargs):
+    follow_graph.forget(instance.pk)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def forget_changed_followees(sender, instance, **kwargs):
+    """Сбрасывает закешированные подписки при записи в Follow в обход
+    posts.follow_graph: из админки, фоновых задач или shell."""
+    follow_graph.forget(instance.user_id)
+
+
+@receiver(post_save, sender=Post)
+def update_group_counters_on_save(sender, instance, created, **kwargs):
+    """Поддерживает счётчик постов и активность групп при создании и
+    редактировании поста, в том числе при смене группы."""
+    if getattr(_counters, 'suspended', False):
+        return
+    old_group_id = None if created else getattr(
+        instance, '_loaded_group_id', instance.group_id
+    )
+    new_group_id = instance.group_id
+    if old_group_id != new_group_id:
+        if old_group_id is not None:
+            Group.objects.filter(
+                pk=old_group_id, posts_count__gt=0
+            ).update(posts_count=F('posts_count') - 1)
+        if new_group_id is not None:
+            Group.objects.filter(pk=new_group_id).update(
+                posts_count=F('posts_count') + 1,
+                last_activity=timezone.now(),
+            )
+    elif new_group_id is not None:
+        Group.objects.filter(pk=new_group_id).update(
+            last_activity=timezone.now()
+        )
+    instance._loaded_group_id = new_group_id
+
+
+@receiver(post_delete, sender=Post)
+def update_group_counters_on_delete(sender, instance, **kwargs):
+    if getattr(_counters, 'suspended', False):
+        return
+    group_id = getattr(instance, '_loaded_group_id', instance.group_id)
+    if group_id is not None:
+        Group.objects.filter(
+            pk=group_id, posts_count__gt=0
+        ).update(posts_count=F('posts_count') - 1)
+
+
+@receiver(pre_save, sender=Post)
+def mark_image_upload(sender, instance, **kwargs):
+    """Запоминает, что картинка сейчас загрузится: ссылку на неё возьмёт
+    хранилище."""
+    instance._image_uploaded = bool(instance.image) and (
+        not instance.image._committed
+    )
+
+
+@receiver(post_save, sender=Post)
+def update_image_refs_on_save(sender, instance, created, **kwargs):
+    """Учитывает ссылку на новую картинку поста и снимает со старой."""
+    if not created and not hasattr(instance, '_loaded_image'):
+        return
+    old_name = '' if created else instance._loaded_image
+    new_name = instance.image.name or ''
+    if old_name != new_name and not images.is_suspended():
+        if new_name and not instance._image_uploaded:
+            images.acquire(new_name)
+        if old_name:
+            images.release(old_name)
+    elif instance._image_uploaded and not images.is_suspended():
+        # Загружены те же байты: ссылка хранилища оказалась лишней.
+        images.release(new_name)
+    instance._loaded_image = new_name
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=ArchivedPost)
+def release_image_on_delete(sender, instance, **kwargs):
+    if instance.image and not images.is_suspended():
+        images.release(instance.image.name)
+
+
+@receiver(pre_save, sender=Post)
+def store_image_metadata(sender, instance, **kwargs):
+    """Записывает размеры, формат и превью новой картинки поста."""
+    if not instance._state.adding and not hasattr(instance, '_loaded_image'):
+        return
+    image = instance.image
+    if image._committed and image.name == getattr(
+        instance, '_loaded_image', None
+    ):
+        return
+    images.update_metadata(instance)
+
+
+@receiver(pre_save, sender=Post)
+def render_text_html(sender, instance, update_fields=None, **kwargs):
+    """Строит HTML текста поста текущей версией разметки."""
+    if update_fields is not None and 'text' not in update_fields:
+        return
+    instance.text_html = markup.render(instance.text)
+    instance.text_html_version = markup.RENDERER_VERSION
@@ -0,0 +1,59 @@
+import hashlib
+import os
+import posixpath
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+
+
+UPLOAD_TMP_DIR = 'tmp'
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Хранилище, раскладывающее файлы по SHA-256 содержимого.
+
+    Файл posts/cat.jpg сохраняется как posts/<2 символа>/<sha256>.jpg:
+    загрузка пишется во временный файл с подсчётом хеша по мере чтения
+    чанков, а если такой файл уже есть, копия просто удаляется. Ссылка
+    на файл берётся (posts.images.acquire_upload) до этой проверки, чтобы
+    ожидающее удаление не унесло переиспользованный файл.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def _save(self, name, content):
+        from .images import acquire_upload
+
+        directory, filename = posixpath.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        tmp_dir = self.path(UPLOAD_TMP_DIR)
+        os.makedirs(tmp_dir, exist_ok=True)
+        digest = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    tmp.write(chunk)
+            hexdigest = digest.hexdigest()
+            name = posixpath.join(
+                directory, hexdigest[:2], hexdigest + extension
+            )
+            acquire_upload(name)
+            full_path = self.path(name)
+            if os.path.exists(full_path):
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                os.chmod(tmp_path, self.file_permissions_mode or 0o644)
+                os.replace(tmp_path, full_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return name
+
+
+image_storage = ContentAddressedStorage()
@@ -0,0 +1,121 @@
+import json
+from itertools import chain
+
+from django.db import transaction
+
+from .models import Follow, FollowSuggestion, User
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:
+    np = sparse = None
+
+
+ROWS_PER_CHUNK = 20000
+WRITE_BATCH_SIZE = 500
+
+
+def load_follow_edges():
+    """Загружает таблицу подписок в два массива: user_id и author_id.
+
+    Размер массива не берётся из отдельного COUNT(*): подписка, добавленная
+    или удалённая между запросами, сломала бы разбор.
+    """
+    edges = Follow.objects.values_list('user_id', 'author_id').iterator()
+    flat = np.fromiter(chain.from_iterable(edges), dtype=np.int64)
+    return flat[0::2], flat[1::2]
+
+
+def compute_suggestions(users, authors, top_n):
+    """
+    Считает рекомендации «кого почитать» по графу подписок.
+
+    Рейтинг автора w для пользователя u — число авторов, на которых
+    подписан u и которые сами подписаны на w. Существующие подписки и сам
+    пользователь исключаются. Возвращает словарь
+    {user_id: [(author_id, score), ...]} с top_n авторами на пользователя.
+    """
+    if len(users) == 0:
+        return {}
+    ids, inverse = np.unique(
+        np.concatenate([users, authors]), return_inverse=True
+    )
+    size = len(ids)
+    rows, cols = inverse[:len(users)], inverse[len(users):]
+    graph = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float32), (rows, cols)),
+        shape=(size, size),
+    )
+    graph.sum_duplicates()
+    graph.data[:] = 1
+
+    suggestions = {}
+    for start in range(0, size, ROWS_PER_CHUNK):
+        chunk = graph[start:start + ROWS_PER_CHUNK]
+        scores = (chunk @ graph).tocoo()
+        score_rows = scores.row.astype(np.int64) + start
+        score_cols = scores.col.astype(np.int64)
+
+        followed = chunk.tocoo()
+        followed_keys = (
+            (followed.row.astype(np.int64) + start) * size + followed.col
+        )
+        keep = (score_rows != score_cols) & ~np.isin(
+            score_rows * size + score_cols, followed_keys
+        )
+        score_rows = score_rows[keep]
+        score_cols = score_cols[keep]
+        score_data = scores.data[keep]
+        if not len(score_rows):
+            continue
+
+        order = np.lexsort((score_cols, -score_data, score_rows))
+        score_rows = score_rows[order]
+        score_cols = score_cols[order]
+        score_data = score_data[order]
+        _, starts, counts = np.unique(
+            score_rows, return_index=True, return_counts=True
+        )
+        rank = np.arange(len(score_rows)) - np.repeat(starts, counts)
+        top = rank < top_n
+
+        for user_index, author_index, score in zip(
+            ids[score_rows[top]].tolist(),
+            ids[score_cols[top]].tolist(),
+            score_data[top].tolist(),
+        ):
+            suggestions.setdefault(user_index, []).append(
+                (author_index, int(score))
+            )
+    return suggestions
+
+
+def rebuild_suggestions(top_n):
+    """Пересчитывает и сохраняет рекомендации для всех пользователей."""
+    users, authors = load_follow_edges()
+    suggestions = compute_suggestions(users, authors, top_n)
+    usernames = dict(User.objects.values_list('id', 'username').iterator())
+    objects = (
+        FollowSuggestion(
+            user_id=user_id,
+            authors=json.dumps([
+                {'id': author_id, 'username': usernames[author_id],
+                 'score': score}
+                for author_id, score in ranked
+                if author_id in usernames
+            ]),
+        )
+        for user_id, ranked in suggestions.items()
+        if user_id in usernames
+    )
+    with transaction.atomic():
+        FollowSuggestion.objects.all().delete()
+        batch = []
+        for suggestion in objects:
+            batch.append(suggestion)
+            if len(batch) == WRITE_BATCH_SIZE:
+                FollowSuggestion.objects.bulk_create(batch)
+                batch = []
+        FollowSuggestion.objects.bulk_create(batch)
+    return len(suggestions)
@@ -0,0 +1,244 @@
+import pickle
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Max, Q
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from core.tasks import release_idempotency_key, task
+from core.thumbnails import responsive_thumbnails
+from . import follow_graph, images
+from .models import (
+    ArchivedComment, ArchivedPost, BulkJob, BulkJobItem, Comment, Follow,
+    Group, Post, User,
+)
+from .signals import group_counters_suspended
+
+
+@task()
+def generate_thumbnails(post_id):
+    """Заранее создаёт миниатюры картинки поста всех ширин для лент."""
+    post = Post.objects.filter(id=post_id).first()
+    if post is None or not post.image:
+        return
+    responsive_thumbnails(post.image, post.image_width)
+
+
+def schedule_user_deletion(user):
+    """
+    Мягко удаляет пользователя: сразу скрывает его и весь его контент,
+    а само удаление ставит в очередь фоновых задач.
+    """
+    with transaction.atomic():
+        user.is_active = False
+        user.save(update_fields=['is_active'])
+        purge_user.enqueue((user.id,), idempotency_key=_purge_key(user.id))
+
+
+def _purge_key(user_id):
+    return f'purge-user:{user_id}'
+
+
+def _delete_batch(queryset):
+    """Удаляет одну пачку строк queryset и возвращает число удалённых."""
+    ids = list(queryset.values_list('id', flat=True)[
+        :settings.USER_PURGE_BATCH_SIZE
+    ])
+    if ids:
+        queryset.model.objects.filter(id__in=ids).delete()
+    return len(ids)
+
+
+def _delete_follows_batch(user_id):
+    """Удаляет пачку подписок пользователя и на него.
+
+    Подписчики забывают закешированный список авторов, иначе удалённый
+    автор оставался бы в их ленте до истечения кеша.
+    """
+    follows = list(Follow.objects.filter(
+        Q(user_id=user_id) | Q(author_id=user_id)
+    ).values_list('id', 'user_id')[:settings.USER_PURGE_BATCH_SIZE])
+    if follows:
+        Follow.objects.filter(
+            id__in=[follow_id for follow_id, _ in follows]
+        ).delete()
+        for follower_id in {follower_id for _, follower_id in follows}:
+            follow_graph.forget(follower_id)
+    return len(follows)
+
+
+def _shift_group_counters(counts, sign=1):
+    """Одним запросом на группу сдвигает счётчики на counts[group_id]."""
+    for group_id, count in counts.items():
+        Group.objects.filter(pk=group_id).update(
+            posts_count=Greatest(F('posts_count') + sign * count, 0)
+        )
+
+
+def _delete_posts(model, posts):
+    """Удаляет посты и одним запросом на группу поправляет счётчики.
+
+    Картинки с миниатюрами освобождает сигнал post_delete.
+    """
+    removed = Counter(post.group_id for post in posts if post.group_id)
+    with transaction.atomic(), group_counters_suspended():
+        model.objects.filter(id__in=[post.id for post in posts]).delete()
+        _shift_group_counters(removed, -1)
+
+
+def _delete_posts_batch(model, user_id):
+    posts = list(model.objects.filter(author_id=user_id).only(
+        'id', 'group_id'
+    )[:settings.USER_PURGE_BATCH_SIZE])
+    if posts:
+        _delete_posts(model, posts)
+    return len(posts)
+
+
+@task(priority=-1)
+def purge_user(user_id):
+    """
+    Удаляет одну пачку контента мягко удалённого пользователя.
+
+    Горячие и архивные посты с картинками и миниатюрами, комментарии и
+    подписки удаляются короткими транзакциями по USER_PURGE_BATCH_SIZE
+    строк, после каждой пачки задача ставит себя в очередь с паузой
+    USER_PURGE_PAUSE, чтобы не держать блокировку базы и не занимать
+    воркер. Когда контента не осталось, удаляется сам пользователь.
+    """
+    if User.objects.filter(id=user_id, is_active=True).exists():
+        # Пользователя восстановили: следующее удаление начнёт новую
+        # цепочку задач.
+        release_idempotency_key(_purge_key(user_id))
+        return
+    deleted = (
+        _delete_posts_batch(Post, user_id)
+        or _delete_posts_batch(ArchivedPost, user_id)
+        or _delete_batch(Comment.objects.filter(author_id=user_id))
+        or _delete_batch(ArchivedComment.objects.filter(author_id=user_id))
+        or _delete_follows_batch(user_id)
+    )
+    if deleted:
+        purge_user.enqueue(
+            (user_id,), countdown=settings.USER_PURGE_PAUSE
+        )
+        return
+    user = User.objects.filter(id=user_id).first()
+    if user is not None:
+        user.delete()
+    release_idempotency_key(_purge_key(user_id))
+
+
+def start_bulk_job(action, queryset, group=None, user=None):
+    """
+    Создаёт массовое действие над постами queryset и ставит его в очередь.
+
+    Сохраняется только запрос выборки и её граница по id, а сами посты
+    записываются в BulkJobItem уже фоновой задачей, пачками по
+    BULK_JOB_BATCH_SIZE, поэтому запрос админки не вставляет строку на
+    каждый выбранный пост.
+    """
+    bounds = queryset.aggregate(total=Count('id'), last_post_id=Max('id'))
+    with transaction.atomic():
+        job = BulkJob.objects.create(
+            action=action,
+            group=group,
+            total=bounds['total'],
+            selection=pickle.dumps(queryset.query),
+            last_post_id=bounds['last_post_id'] or 0,
+            created_by=user,
+        )
+        run_bulk_job.delay(job.id)
+    return job
+
+
+def _select_batch(job):
+    """Записывает в BulkJobItem следующую пачку постов выборки."""
+    queryset = Post.objects.all()
+    queryset.query = pickle.loads(job.selection)
+    post_ids = list(queryset.filter(
+        id__gt=job.selection_cursor, id__lte=job.last_post_id
+    ).order_by('id').values_list(
+        'id', flat=True
+    )[:settings.BULK_JOB_BATCH_SIZE])
+    with transaction.atomic():
+        BulkJobItem.objects.bulk_create(
+            [BulkJobItem(job=job, post_id=post_id) for post_id in post_ids],
+            ignore_conflicts=True,
+        )
+        if (len(post_ids) < settings.BULK_JOB_BATCH_SIZE
+                or post_ids[-1] >= job.last_post_id):
+            job.selection = None
+        else:
+            job.selection_cursor = post_ids[-1]
+        job.save(update_fields=['selection', 'selection_cursor', 'updated'])
+
+
+def _reassign_group(posts, group):
+    moved = [post for post in posts if post.group_id != group.id]
+    if not moved:
+        return
+    with transaction.atomic():
+        Post.objects.filter(id__in=[post.id for post in moved]).update(
+            group=group
+        )
+        _shift_group_counters(
+            Counter(post.group_id for post in moved if post.group_id), -1
+        )
+        Group.objects.filter(pk=group.id).update(
+            posts_count=F('posts_count') + len(moved),
+            last_activity=timezone.now(),
+        )
+
+
+def _purge_images(posts):
+    posts = [post for post in posts if post.image]
+    with transaction.atomic():
+        Post.objects.filter(id__in=[post.id for post in posts]).update(
+            image='', **images.EMPTY_METADATA
+        )
+        for post in posts:
+            images.release(post.image.name)
+
+
+@task(priority=-1)
+def run_bulk_job(job_id):
+    """
+    Выполняет следующую пачку массового действия из админки.
+
+    За один запуск обрабатывается BULK_JOB_BATCH_SIZE постов, счётчики
+    групп сдвигаются одним запросом на группу, а не на каждый пост.
+    Пока пачки не кончились, задача ставит себя в очередь с паузой
+    BULK_JOB_PAUSE; прогресс виден в админке в BulkJob.processed.
+    Пока выборка не записана в BulkJobItem целиком, запуск вместо
+    обработки записывает следующую её пачку.
+    """
+    job = BulkJob.objects.filter(id=job_id, status=BulkJob.RUNNING).first()
+    if job is None:
+        return
+    if job.selection is not None:
+        _select_batch(job)
+        run_bulk_job.enqueue((job.id,), countdown=settings.BULK_JOB_PAUSE)
+        return
+    batch = list(job.items.order_by('post_id').values_list(
+        'post_id', flat=True
+    )[:settings.BULK_JOB_BATCH_SIZE])
+    posts = list(Post.objects.filter(id__in=batch).only(
+        'id', 'group_id', 'image'
+    ))
+    with transaction.atomic():
+        if job.action == BulkJob.DELETE:
+            _delete_posts(Post, posts)
+        elif job.action == BulkJob.REASSIGN_GROUP and job.group is not None:
+            _reassign_group(posts, job.group)
+        elif job.action == BulkJob.PURGE_IMAGES:
+            _purge_images(posts)
+        job.items.filter(post_id__in=batch).delete()
+        job.processed += len(batch)
+        if not batch or job.processed >= job.total:
+            job.status = BulkJob.DONE
+        job.save(update_fields=['processed', 'status', 'updated'])
+    if job.status == BulkJob.RUNNING:
+        run_bulk_job.enqueue((job.id,), countdown=settings.BULK_JOB_PAUSE)
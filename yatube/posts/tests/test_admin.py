@@ -0,0 +1,57 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class AdminChangelistTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test', description='Описание')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def create_posts(self, amount):
+        for i in range(amount):
+            author = User.objects.create_user(
+                username=f'author_{Post.objects.count()}')
+            post = Post.objects.create(
+                text=f'Пост {i}', author=author, group=self.group)
+            Comment.objects.create(post=post, author=author, text='Текст')
+            Follow.objects.create(user=self.admin, author=author)
+
+    def changelist_queries(self, model):
+        url = reverse(f'admin:posts_{model}_changelist')
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        """Число запросов списка в админке не зависит от числа строк."""
+        self.create_posts(2)
+        for model in ('post', 'comment', 'follow', 'group'):
+            with self.subTest(model=model):
+                cache.clear()
+                few = self.changelist_queries(model)
+                self.create_posts(5)
+                cache.clear()
+                self.assertEqual(self.changelist_queries(model), few)
+
+    def test_autocomplete_lists_groups(self):
+        """Группы для поста выбираются через автодополнение."""
+        response = self.client.get(
+            reverse('admin:posts_group_autocomplete'), {'term': 'Тест'})
+        self.assertEqual(
+            [result['text'] for result in response.json()['results']],
+            ['Тестовая группа'])
@@ -0,0 +1,106 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from notifications.models import Notification
+from posts import revisions
+from posts.models import (
+    ArchivedComment, ArchivedPost, ArchivedPostRevision, Comment, Group,
+    Post, PostRevision, User,
+)
+
+
+class ArchiveTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test', description='Описание')
+
+    def setUp(self):
+        cache.clear()
+        self.old_posts = [
+            Post.objects.create(
+                text=f'Старый пост {i}', author=self.user, group=self.group)
+            for i in range(3)
+        ]
+        for age, post in enumerate(reversed(self.old_posts)):
+            Post.objects.filter(id=post.id).update(
+                pub_date=timezone.now() - timedelta(days=400 + age))
+        self.comment = Comment.objects.create(
+            post=self.old_posts[0], author=self.user, text='Комментарий')
+        revisions.record_edit(
+            self.old_posts[0], 'Первая версия', 'Старый пост 0')
+        Notification.objects.create(
+            recipient=self.user, post=self.old_posts[0])
+        self.new_post = Post.objects.create(
+            text='Новый пост', author=self.user, group=self.group)
+        call_command('archive_posts', days=365, batch_size=2, stdout=None)
+
+    def test_old_posts_moved_with_comments(self):
+        """Старые посты и комментарии переезжают в архив, счётчики целы."""
+        self.assertEqual(list(Post.objects.all()), [self.new_post])
+        self.assertEqual(ArchivedPost.objects.count(), 3)
+        self.assertFalse(Comment.objects.exists())
+        self.assertEqual(
+            ArchivedComment.objects.get().post_id, self.old_posts[0].id)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 4)
+
+    def test_revisions_moved_and_notifications_dropped(self):
+        """История правок переезжает в архив, уведомления удаляются."""
+        post_id = self.old_posts[0].id
+        self.assertFalse(PostRevision.objects.exists())
+        self.assertEqual(
+            ArchivedPostRevision.objects.filter(post_id=post_id).count(), 2)
+        self.assertFalse(Notification.objects.exists())
+        response = Client().get(
+            reverse('posts:post_history', kwargs={'post_id': post_id}),
+            {'rev': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['text'], 'Первая версия')
+
+    def test_post_detail_reads_archive(self):
+        """post_detail показывает архивный пост по старому id."""
+        response = Client().get(reverse(
+            'posts:post_detail', kwargs={'post_id': self.old_posts[0].id}))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['is_archived'])
+        self.assertEqual(response.context['post'].text, 'Старый пост 0')
+        self.assertContains(response, '<p>Старый пост 0</p>', html=True)
+        self.assertEqual(len(response.context['comments']), 1)
+        self.assertEqual(response.context['count'], 4)
+
+    def test_profile_pages_continue_into_archive(self):
+        """Профиль листает горячие посты, а затем архивные."""
+        response = Client().get(
+            reverse('posts:profile', kwargs={'username': 'auth'}))
+        self.assertEqual(response.context['count'], 4)
+        self.assertEqual(
+            [post.text for post in response.context['page_obj']],
+            ['Новый пост', 'Старый пост 2', 'Старый пост 1', 'Старый пост 0'])
+
+    def test_post_counts_cached(self):
+        """Повторные профиль и пост не пересчитывают посты автора."""
+        addresses = [
+            reverse('posts:profile', kwargs={'username': 'auth'}),
+            reverse('posts:post_detail', kwargs={'post_id': self.new_post.id}),
+        ]
+        for address in addresses:
+            Client().get(address)
+        for address in addresses:
+            with self.subTest(address=address):
+                with CaptureQueriesContext(connection) as queries:
+                    response = Client().get(address)
+                self.assertEqual(response.context['count'], 4)
+                self.assertFalse([
+                    query for query in queries
+                    if 'COUNT(' in query['sql']
+                ])
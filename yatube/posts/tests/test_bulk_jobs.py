@@ -0,0 +1,103 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.tasks import run_pending
+from posts.models import BulkJob, Group, Post, User
+from posts.tasks import run_bulk_job
+
+
+@override_settings(BULK_JOB_BATCH_SIZE=2, BULK_JOB_PAUSE=0)
+class BulkJobTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        cls.source = Group.objects.create(
+            title='Старая группа', slug='old', description='Описание')
+        cls.target = Group.objects.create(
+            title='Новая группа', slug='new', description='Описание')
+
+    def setUp(self):
+        cache.clear()
+        self.posts = [
+            Post.objects.create(
+                text=f'Пост {i}', author=self.admin, group=self.source)
+            for i in range(5)
+        ]
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def run_action(self, action, **data):
+        response = self.client.post(
+            reverse('admin:posts_post_changelist'),
+            {
+                'action': action,
+                '_selected_action': [post.id for post in self.posts],
+                **data,
+            },
+        )
+        self.assertEqual(response.status_code, 302)
+        return BulkJob.objects.get()
+
+    def assert_counters(self, source, target):
+        self.source.refresh_from_db()
+        self.target.refresh_from_db()
+        self.assertEqual(
+            (self.source.posts_count, self.target.posts_count),
+            (source, target))
+
+    def test_reassign_group_in_batches(self):
+        """Перенос в группу идёт пачками и сдвигает счётчики групп."""
+        job = self.run_action('reassign_group_in_background', group='new')
+        self.assertEqual(Post.objects.filter(group=self.target).count(), 0)
+        # Три запуска записывают выборку, ещё три обрабатывают её.
+        self.assertEqual(run_pending(), 6)
+        job.refresh_from_db()
+        self.assertEqual(
+            (job.processed, job.status), (5, BulkJob.DONE))
+        self.assertEqual(Post.objects.filter(group=self.target).count(), 5)
+        self.assert_counters(0, 5)
+        self.assertFalse(job.items.exists())
+
+    def test_selection_stored_in_background(self):
+        """Запрос админки не пишет посты выборки, это делает задача."""
+        self.posts = self.posts[1:]
+        job = self.run_action('purge_images_in_background')
+        self.assertEqual(job.total, 4)
+        self.assertFalse(job.items.exists())
+        Post.objects.create(text='Новый пост', author=self.admin)
+        for _ in range(2):
+            run_bulk_job(job.id)
+        job.refresh_from_db()
+        self.assertIsNone(job.selection)
+        self.assertEqual(
+            sorted(job.items.values_list('post_id', flat=True)),
+            sorted(post.id for post in self.posts))
+
+    def test_batches_read_only_pending_items(self):
+        """Каждая пачка читает только необработанные посты задания."""
+        job = self.run_action('purge_images_in_background')
+        for _ in range(3):
+            run_bulk_job(job.id)
+        self.assertEqual(job.items.count(), 5)
+        run_bulk_job(job.id)
+        self.assertEqual(
+            sorted(job.items.values_list('post_id', flat=True)),
+            sorted(post.id for post in self.posts)[2:])
+
+    def test_delete_in_batches(self):
+        """Удаление в фоне убирает посты и уменьшает счётчики."""
+        self.run_action('delete_in_background')
+        self.assertEqual(Post.objects.count(), 5)
+        run_pending()
+        self.assertFalse(Post.objects.exists())
+        self.assert_counters(0, 0)
+
+    def test_progress_shown_in_admin(self):
+        """Прогресс массового действия виден в админке."""
+        self.run_action('delete_in_background')
+        response = self.client.get(
+            reverse('admin:posts_bulkjob_changelist'))
+        self.assertContains(response, '0/5 (0%)')
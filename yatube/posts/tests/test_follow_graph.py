@@ -0,0 +1,108 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import follow_graph
+from posts.models import Follow, User
+
+
+@mock.patch('posts.follow_graph.is_shared_cache', return_value=True)
+class FollowGraphTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='follower')
+        cls.authors = [
+            User.objects.create_user(username=f'author_{i}')
+            for i in range(3)
+        ]
+        Follow.objects.create(user=cls.user, author=cls.authors[0])
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_bulk_check_uses_single_cache_read(self, is_shared_cache):
+        """Проверка подписок на страницу авторов не делает запросов."""
+        author_ids = [author.id for author in self.authors]
+        follow_graph.get_followees(self.user.id)
+        with self.assertNumQueries(0):
+            following = follow_graph.following_authors(
+                self.user.id, author_ids)
+        self.assertEqual(following, {self.authors[0].id})
+
+    def test_graph_updated_on_follow_and_unfollow(self, is_shared_cache):
+        """Подписка и отписка обновляют закешированный граф."""
+        author = self.authors[1]
+        self.assertFalse(follow_graph.is_following(self.user.id, author.id))
+        self.authorized_client.get(reverse(
+            'posts:profile_follow', kwargs={'username': author.username}))
+        with self.assertNumQueries(0):
+            self.assertTrue(
+                follow_graph.is_following(self.user.id, author.id))
+        self.authorized_client.get(reverse(
+            'posts:profile_unfollow', kwargs={'username': author.username}))
+        with self.assertNumQueries(0):
+            self.assertFalse(
+                follow_graph.is_following(self.user.id, author.id))
+
+    def test_follow_and_unfollow_are_single_statements(self, is_shared_cache):
+        """Подписка и отписка выполняются одним запросом и идемпотентны."""
+        author = self.authors[2]
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                follow_graph.follow(self.user.id, [author.id])
+        self.assertEqual(
+            Follow.objects.filter(user=self.user, author=author).count(), 1)
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                follow_graph.unfollow(self.user.id, [author.id])
+        self.assertFalse(
+            Follow.objects.filter(user=self.user, author=author).exists())
+
+    def test_unfollow_without_follow_does_not_fail(self, is_shared_cache):
+        """Отписка от автора без подписки не приводит к ошибке."""
+        response = self.authorized_client.get(reverse(
+            'posts:profile_unfollow',
+            kwargs={'username': self.authors[2].username}))
+        self.assertEqual(response.status_code, 302)
+
+    def test_bulk_follow_endpoint(self, is_shared_cache):
+        """Можно подписаться и отписаться от списка авторов за раз."""
+        usernames = f'{self.authors[1].username}, {self.authors[2].username}'
+        response = self.authorized_client.post(
+            reverse('posts:bulk_follow'),
+            data={'usernames': usernames + ' ghost', 'action': 'follow'})
+        self.assertEqual(response.json()['unknown'], ['ghost'])
+        self.assertEqual(
+            self.user.follower.count(), len(self.authors))
+        self.authorized_client.post(
+            reverse('posts:bulk_follow'),
+            data={'usernames': usernames, 'action': 'unfollow'})
+        self.assertEqual(
+            list(follow_graph.get_followees(self.user.id)),
+            [self.authors[0].id])
+
+    def test_graph_reset_on_direct_follow_changes(self, is_shared_cache):
+        """Запись в Follow в обход модуля сбрасывает кеш подписок."""
+        author = self.authors[1]
+        self.assertFalse(follow_graph.is_following(self.user.id, author.id))
+        follow = Follow.objects.create(user=self.user, author=author)
+        self.assertTrue(follow_graph.is_following(self.user.id, author.id))
+        follow.delete()
+        self.assertFalse(follow_graph.is_following(self.user.id, author.id))
+
+
+class LocalFollowGraphTests(TestCase):
+
+    def test_followees_read_from_db_without_shared_cache(self):
+        """Без общего кеша подписки из другого воркера видны сразу."""
+        user = User.objects.create_user(username='follower')
+        author = User.objects.create_user(username='author')
+        self.assertFalse(follow_graph.is_following(user.id, author.id))
+        # bulk_create не шлёт сигналов, как запись в другом процессе.
+        Follow.objects.bulk_create([Follow(user=user, author=author)])
+        self.assertTrue(follow_graph.is_following(user.id, author.id))
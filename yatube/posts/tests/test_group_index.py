@@ -0,0 +1,61 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+
+
+class GroupIndexTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test',
+            description='Тестовое описание',
+        )
+        cls.group_extra = Group.objects.create(
+            title='Дополнительная тестовая группа',
+            slug='test_extra',
+            description='Тестовое описание',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def assertCounts(self, group_count, group_extra_count):
+        self.group.refresh_from_db()
+        self.group_extra.refresh_from_db()
+        self.assertEqual(self.group.posts_count, group_count)
+        self.assertEqual(self.group_extra.posts_count, group_extra_count)
+
+    def test_counters_follow_post_lifecycle(self):
+        """Счётчики групп меняются при создании, смене группы и удалении."""
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Новый пост', 'group': self.group.id})
+        self.assertCounts(1, 0)
+        self.assertIsNotNone(self.group.last_activity)
+        post = Post.objects.get(text='Новый пост')
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': post.id}),
+            data={'text': 'Новый пост', 'group': self.group_extra.id})
+        self.assertCounts(0, 1)
+        Post.objects.get(id=post.id).delete()
+        self.assertCounts(0, 0)
+
+    @mock.patch('posts.views.GROUP_AMOUNT', 1)
+    def test_group_index_keyset_pagination(self):
+        """Каталог групп листается по курсору."""
+        response = self.client.get(reverse('posts:group_index'))
+        self.assertEqual(response.context['groups'], [self.group])
+        cursor = response.context['next_cursor']
+        response = self.client.get(
+            reverse('posts:group_index'), {'after': cursor})
+        self.assertEqual(response.context['groups'], [self.group_extra])
+        self.assertIsNone(response.context['next_cursor'])
@@ -0,0 +1,118 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from core.templatetags.responsive_images import responsive_image
+from posts import archive, images
+from posts.models import ArchivedPost, Post, User
+
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (b'\x47\x49\x46\x38\x39\x61\x02\x00'
+             b'\x01\x00\x80\x00\x00\x00\x00\x00'
+             b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+             b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+             b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+             b'\x0A\x00\x3B')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+@mock.patch('posts.images.transaction.on_commit',
+            side_effect=lambda callback: callback())
+class ImageMetadataTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def create_post(self):
+        self.authorized_client.post(reverse('posts:post_create'), data={
+            'text': 'Пост с картинкой',
+            'image': SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif'),
+        })
+        return Post.objects.latest('id')
+
+    def test_metadata_stored_on_upload(self, on_commit):
+        """При загрузке картинки в пост пишутся её размеры и превью."""
+        post = self.create_post()
+        self.assertEqual((post.image_width, post.image_height), (2, 1))
+        self.assertEqual(post.image_size, len(SMALL_GIF))
+        self.assertEqual(post.image_format, 'gif')
+        self.assertTrue(
+            post.image_placeholder.startswith('data:image/jpeg;base64,'))
+
+    def test_metadata_cleared_without_image(self, on_commit):
+        """Пост без картинки не хранит её метаданных."""
+        post = self.create_post()
+        post.image = None
+        post.save()
+        post.refresh_from_db()
+        for field, value in images.EMPTY_METADATA.items():
+            self.assertEqual(getattr(post, field), value)
+
+    def test_page_uses_stored_dimensions(self, on_commit):
+        """Миниатюра выводится с размерами, srcset и размытым фоном."""
+        post = self.create_post()
+        response = self.authorized_client.get(
+            reverse('posts:post_detail', args=(post.id,)))
+        self.assertContains(response, 'width="2" height="1"')
+        self.assertContains(response, 'loading="lazy"')
+        self.assertContains(response, post.image_placeholder)
+
+    def test_srcset_limited_by_source_width(self, on_commit):
+        """Кадры шире исходной картинки не строятся."""
+        image = BytesIO()
+        Image.new('RGB', (700, 300)).save(image, 'PNG')
+        self.authorized_client.post(reverse('posts:post_create'), data={
+            'text': 'Пост с широкой картинкой',
+            'image': SimpleUploadedFile(
+                'wide.png', image.getvalue(), 'image/png'),
+        })
+        post = Post.objects.latest('id')
+        context = responsive_image(post.image, post.image_width)
+        self.assertEqual(
+            [item.split()[-1] for item in context['srcset'].split(', ')],
+            ['320w', '480w', '640w'])
+        self.assertEqual((context['width'], context['height']), (640, 226))
+
+    def test_backfill_command(self, on_commit):
+        """Команда заполняет метаданные ранее загруженных картинок."""
+        post = self.create_post()
+        Post.objects.filter(id=post.id).update(**images.EMPTY_METADATA)
+        out = StringIO()
+        call_command('backfill_image_metadata', workers=1, stdout=out)
+        post.refresh_from_db()
+        self.assertEqual((post.image_width, post.image_height), (2, 1))
+        self.assertEqual(post.image_format, 'gif')
+        self.assertIn('заполнены для 1 постов', out.getvalue())
+
+    def test_metadata_kept_in_archive(self, on_commit):
+        """Метаданные картинки переезжают в архив вместе с постом."""
+        post = self.create_post()
+        archive.archive_batch(timezone.now() + timedelta(days=1), 10)
+        archived = ArchivedPost.objects.get(id=post.id)
+        for field in images.METADATA_FIELDS:
+            with self.subTest(field=field):
+                self.assertEqual(
+                    getattr(archived, field), getattr(post, field))
@@ -0,0 +1,135 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from sorl.thumbnail import get_thumbnail
+
+from posts.models import ImageBlob, Post, User
+from posts.storage import image_storage
+
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (b'\x47\x49\x46\x38\x39\x61\x02\x00'
+             b'\x01\x00\x80\x00\x00\x00\x00\x00'
+             b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+             b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+             b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+             b'\x0A\x00\x3B')
+OTHER_GIF = SMALL_GIF.replace(b'\xFF\xFF\xFF', b'\x00\xFF\x00')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+@mock.patch('posts.images.transaction.on_commit',
+            side_effect=lambda callback: callback())
+class ImageDeduplicationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def create_post(self, content, filename='image.gif'):
+        self.authorized_client.post(reverse('posts:post_create'), data={
+            'text': 'Пост с картинкой',
+            'image': SimpleUploadedFile(filename, content, 'image/gif'),
+        })
+        return Post.objects.latest('id')
+
+    def test_duplicates_share_file_and_thumbnail(self, on_commit):
+        """Одинаковые загрузки хранятся одним файлом с общей миниатюрой."""
+        first = self.create_post(SMALL_GIF, 'cat.gif')
+        second = self.create_post(SMALL_GIF, 'copy.GIF')
+        digest = hashlib.sha256(SMALL_GIF).hexdigest()
+        self.assertEqual(first.image.name, f'posts/{digest[:2]}/{digest}.gif')
+        self.assertEqual(second.image.name, first.image.name)
+        self.assertEqual(ImageBlob.objects.get().refs, 2)
+        self.assertEqual(
+            get_thumbnail(first.image, '960x339').name,
+            get_thumbnail(second.image, '960x339').name)
+
+    def test_file_deleted_with_last_reference(self, on_commit):
+        """Файл удаляется только вместе с последним постом."""
+        first = self.create_post(SMALL_GIF)
+        second = self.create_post(SMALL_GIF)
+        path = first.image.path
+        first.delete()
+        self.assertTrue(os.path.exists(path))
+        second.delete()
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(ImageBlob.objects.exists())
+
+    def test_replaced_image_released(self, on_commit):
+        """Замена картинки при редактировании освобождает старую."""
+        post = self.create_post(SMALL_GIF)
+        old_path = post.image.path
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': post.id}),
+            data={
+                'text': 'Новая картинка',
+                'image': SimpleUploadedFile('new.gif', OTHER_GIF, 'image/gif'),
+            })
+        post.refresh_from_db()
+        self.assertNotEqual(post.image.path, old_path)
+        self.assertFalse(os.path.exists(old_path))
+        self.assertEqual(
+            list(ImageBlob.objects.values_list('name', 'refs')),
+            [(post.image.name, 1)])
+
+    def test_reuploaded_file_survives_pending_delete(self, on_commit):
+        """Файл, загруженный снова до удаления, не удаляется."""
+        post = self.create_post(SMALL_GIF)
+        path = post.image.path
+        callbacks = []
+        on_commit.side_effect = callbacks.append
+        post.delete()
+        self.create_post(SMALL_GIF)
+        for callback in callbacks:
+            callback()
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(ImageBlob.objects.get().refs, 1)
+
+    def test_file_reused_mid_upload_survives_pending_delete(self, on_commit):
+        """Хранилище берёт ссылку до того, как переиспользует файл."""
+        post = self.create_post(SMALL_GIF)
+        path = post.image.path
+        callbacks = []
+        on_commit.side_effect = callbacks.append
+        post.delete()
+        name = image_storage.save('posts/again.gif', ContentFile(SMALL_GIF))
+        for callback in callbacks:
+            callback()
+        self.assertEqual(name, post.image.name)
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(ImageBlob.objects.get().refs, 1)
+
+    def test_same_image_reuploaded_on_edit(self, on_commit):
+        """Повторная загрузка той же картинки не добавляет ссылку."""
+        post = self.create_post(SMALL_GIF)
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': post.id}),
+            data={
+                'text': 'Та же картинка',
+                'image': SimpleUploadedFile('same.gif', SMALL_GIF,
+                                            'image/gif'),
+            })
+        self.assertEqual(ImageBlob.objects.get().refs, 1)
+        path = post.image.path
+        Post.objects.get(id=post.id).delete()
+        self.assertFalse(os.path.exists(path))
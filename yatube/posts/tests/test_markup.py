@@ -0,0 +1,96 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, SimpleTestCase, TestCase
+from django.urls import reverse
+
+from posts import markup
+from posts.models import ArchivedPost, Post, User
+
+
+class MarkupTests(SimpleTestCase):
+    def test_render(self):
+        """Разметка превращается в теги, остальной текст экранируется."""
+        cases = {
+            '**жирный** и *курсив*':
+                '<p><strong>жирный</strong> и <em>курсив</em></p>',
+            'строка\nещё\n\nабзац':
+                '<p>строка<br>ещё</p>\n<p>абзац</p>',
+            '- один\n- два': '<ul><li>один</li><li>два</li></ul>',
+            '> цитата': '<blockquote><p>цитата</p></blockquote>',
+            '`<b>`': '<p><code>&lt;b&gt;</code></p>',
+            '<script>alert(1)</script>':
+                '<p>&lt;script&gt;alert(1)&lt;/script&gt;</p>',
+            'см. https://ya.ru/?a=1&b=2.':
+                '<p>см. <a href="https://ya.ru/?a=1&amp;b=2" '
+                'rel="nofollow noopener">https://ya.ru/?a=1&amp;b=2</a>.</p>',
+            '[сайт](https://ya.ru)':
+                '<p><a href="https://ya.ru" rel="nofollow noopener">'
+                'сайт</a></p>',
+            '[x](javascript:alert(1))': '<p>[x](javascript:alert(1))</p>',
+            '  ': '',
+            '2*3 = 6 and 4*5': '<p>2*3 = 6 and 4*5</p>',
+            '**a *b* c**': '<p><strong>a <em>b</em> c</strong></p>',
+            'http://x.com/a_(b)':
+                '<p><a href="http://x.com/a_(b)" rel="nofollow noopener">'
+                'http://x.com/a_(b)</a></p>',
+            '(см. http://x.com/a)':
+                '<p>(см. <a href="http://x.com/a" rel="nofollow noopener">'
+                'http://x.com/a</a>)</p>',
+        }
+        for text, expected in cases.items():
+            with self.subTest(text=text):
+                self.assertEqual(markup.render(text), expected)
+
+
+class PostTextHtmlTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_html_rendered_on_save(self):
+        """HTML текста строится при создании и правке поста."""
+        self.authorized_client.post(
+            reverse('posts:post_create'), data={'text': '**новый**'})
+        post = Post.objects.get()
+        self.assertEqual(post.text_html, '<p><strong>новый</strong></p>')
+        self.assertEqual(post.text_html_version, markup.RENDERER_VERSION)
+        self.authorized_client.post(
+            reverse('posts:post_edit', args=(post.id,)),
+            data={'text': '*правка*'})
+        post.refresh_from_db()
+        self.assertEqual(post.text_html, '<p><em>правка</em></p>')
+        response = self.authorized_client.get(
+            reverse('posts:post_detail', args=(post.id,)))
+        self.assertContains(response, '<p><em>правка</em></p>', html=True)
+
+    def test_raw_text_fallback(self):
+        """Пост без сохранённого HTML выводится экранированным текстом."""
+        post = Post.objects.create(author=self.user, text='**<i>**')
+        Post.objects.filter(id=post.id).update(text_html='')
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, '**&lt;i&gt;**')
+
+    def test_rerender_command(self):
+        """Команда перестраивает HTML постов старой версии разметки."""
+        post = Post.objects.create(author=self.user, text='**старый**')
+        Post.objects.filter(id=post.id).update(
+            text_html='устарело', text_html_version=0)
+        archived = ArchivedPost.objects.create(
+            id=post.id + 1, text='*архив*', pub_date=post.pub_date,
+            author=self.user)
+        out = StringIO()
+        call_command('rerender_posts', stdout=out)
+        post.refresh_from_db()
+        self.assertEqual(post.text_html, '<p><strong>старый</strong></p>')
+        self.assertEqual(post.text_html_version, markup.RENDERER_VERSION)
+        archived.refresh_from_db()
+        self.assertEqual(archived.text_html, '<p><em>архив</em></p>')
+        self.assertIn('Перестроен HTML 2 постов', out.getvalue())
@@ -1,4 +1,6 @@
+from django.core.cache import cache
 from django.test import Client, TestCase
+from core.pagination import CachedCountPaginator, page_window
 from posts.models import Post, Group, User
 from django.urls import reverse
 from yatube.settings import POST_AMOUNT
@@ -25,6 +27,7 @@ class PaginatorViewsTest(TestCase):
         cls.post = Post.objects.bulk_create(post_list)
 
     def setUp(self):
+        cache.clear()
         self.client = Client()
 
     def test_index_first_page_contains_correct_number_of_posts(self):
@@ -70,3 +73,34 @@ class PaginatorViewsTest(TestCase):
             'posts:profile', kwargs={'username': user.username}) + '?page=2')
         self.assertEqual(
             len(response.context['page_obj']), EXPECTED_COUNT)
+
+    def test_count_cached_between_requests(self):
+        """Число постов для пагинации берётся из кеша."""
+        CachedCountPaginator(Post.objects.all(), POST_AMOUNT).count
+        with self.assertNumQueries(0):
+            count = CachedCountPaginator(Post.objects.all(), POST_AMOUNT).count
+        self.assertEqual(count, TEST_POSTS)
+
+    def test_stale_count_falls_back_to_last_page(self):
+        """При устаревшем счётчике отдаётся последняя реальная страница."""
+        CachedCountPaginator(Post.objects.all(), POST_AMOUNT).count
+        Post.objects.filter(id__in=list(Post.objects.values_list(
+            'id', flat=True)[:EXPECTED_COUNT])).delete()
+        paginator = CachedCountPaginator(Post.objects.all(), POST_AMOUNT)
+        page = paginator.get_page(2)
+        self.assertEqual(page.number, 1)
+        self.assertEqual(len(page.object_list), POST_AMOUNT)
+        self.assertEqual(paginator.count, POST_AMOUNT)
+
+    def test_page_window(self):
+        """Навигация показывает окно вокруг текущей страницы и края."""
+        cases = {
+            (1, 1): [1],
+            (1, 3): [1, 2, 3],
+            (10, 50): [1, None, 8, 9, 10, 11, 12, None, 50],
+            (4, 50): [1, 2, 3, 4, 5, 6, None, 50],
+            (50, 50): [1, None, 48, 49, 50],
+        }
+        for (number, num_pages), expected in cases.items():
+            with self.subTest(number=number, num_pages=num_pages):
+                self.assertEqual(page_window(number, num_pages), expected)
@@ -0,0 +1,68 @@
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import revisions
+from posts.models import Post, PostRevision, User
+
+
+class PostRevisionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    def setUp(self):
+        self.post = Post.objects.create(
+            text='Исходный текст поста', author=self.user)
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def edit(self, text):
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.id}),
+            data={'text': text})
+
+    def test_delta_roundtrip(self):
+        """Разница между версиями восстанавливает новый текст."""
+        old = 'Съешь же ещё этих мягких французских булок'
+        new = 'Съешь ещё этих свежих французских булок, да выпей чаю'
+        delta = revisions.make_delta(old, new)
+        self.assertEqual(revisions.apply_delta(old, delta), new)
+
+    @override_settings(POST_REVISION_SNAPSHOT_EVERY=3)
+    def test_every_revision_can_be_reconstructed(self):
+        """Любая версия поста восстанавливается после серии правок."""
+        texts = [self.post.text] + [
+            f'Исходный текст поста, правка {i}' for i in range(1, 6)]
+        for text in texts[1:]:
+            self.edit(text)
+        self.edit(texts[-1])
+        self.assertEqual(self.post.revisions.count(), len(texts))
+        self.assertEqual(
+            list(self.post.revisions.filter(
+                is_snapshot=True).values_list('number', flat=True)),
+            [1, 4])
+        for number, text in enumerate(texts, start=1):
+            with self.subTest(number=number):
+                self.assertEqual(
+                    revisions.revision_text(self.post, number), text)
+
+    def test_history_page_shows_revision(self):
+        """Страница истории показывает выбранную версию."""
+        self.edit('Новый текст')
+        response = self.client.get(
+            reverse('posts:post_history', kwargs={'post_id': self.post.id}),
+            {'rev': 1})
+        self.assertEqual(response.context['text'], 'Исходный текст поста')
+        self.assertEqual(
+            PostRevision.objects.filter(post=self.post).count(), 2)
+
+    def test_unknown_revision_not_found(self):
+        """Несуществующая версия поста отдаёт 404."""
+        url = reverse('posts:post_history', kwargs={'post_id': self.post.id})
+        self.assertEqual(self.client.get(url, {'rev': 1}).status_code, 404)
+        self.edit('Новый текст')
+        for number in (0, 3):
+            with self.subTest(number=number):
+                response = self.client.get(url, {'rev': number})
+                self.assertEqual(response.status_code, 404)
@@ -0,0 +1,50 @@
+from unittest import skipIf
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import suggestions
+from posts.models import Follow, FollowSuggestion, User
+
+
+@skipIf(suggestions.np is None, 'numpy и scipy не установлены')
+class FollowSuggestionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.friend = User.objects.create_user(username='friend')
+        cls.other_friend = User.objects.create_user(username='other_friend')
+        cls.popular = User.objects.create_user(username='popular')
+        cls.niche = User.objects.create_user(username='niche')
+        Follow.objects.bulk_create([
+            Follow(user=cls.user, author=cls.friend),
+            Follow(user=cls.user, author=cls.other_friend),
+            Follow(user=cls.friend, author=cls.popular),
+            Follow(user=cls.other_friend, author=cls.popular),
+            Follow(user=cls.friend, author=cls.niche),
+            Follow(user=cls.friend, author=cls.user),
+            Follow(user=cls.friend, author=cls.other_friend),
+        ])
+
+    def test_suggestions_ranked_by_co_follows(self):
+        """Рекомендации упорядочены по числу общих подписок."""
+        call_command('build_follow_suggestions')
+        authors = [
+            author['username'] for author in
+            FollowSuggestion.objects.get(user=self.user).get_authors()
+        ]
+        self.assertEqual(authors, ['popular', 'niche'])
+
+    def test_profile_shows_suggestions_with_one_lookup(self):
+        """Профиль показывает рекомендации текущего пользователя."""
+        call_command('build_follow_suggestions')
+        client = Client()
+        client.force_login(self.user)
+        response = client.get(reverse(
+            'posts:profile', kwargs={'username': self.friend.username}))
+        self.assertEqual(
+            [author['username']
+             for author in response.context['suggested_authors']],
+            ['popular', 'niche'])
@@ -0,0 +1,69 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.locks import cache_lock
+from posts import trending
+from posts.models import Group, Post, User
+
+
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test',
+            description='Тестовое описание',
+        )
+        cls.quiet_post = Post.objects.create(
+            text='Тихий пост', author=cls.user, group=cls.group)
+        cls.hot_post = Post.objects.create(
+            text='Горячий пост', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_comments_raise_post_in_trending(self):
+        """Комментарии поднимают пост в популярном."""
+        self.client.get(reverse(
+            'posts:post_detail', kwargs={'post_id': self.quiet_post.id}))
+        for _ in range(2):
+            self.authorized_client.post(
+                reverse('posts:add_comment',
+                        kwargs={'post_id': self.hot_post.id}),
+                data={'text': 'Комментарий'})
+        response = self.client.get(reverse('posts:trending'))
+        self.assertEqual(
+            list(response.context['page_obj']),
+            [self.hot_post, self.quiet_post])
+
+    def test_group_trending_contains_only_group_posts(self):
+        """Популярное группы содержит только посты группы."""
+        trending.register_comment(self.quiet_post)
+        trending.register_comment(self.hot_post)
+        response = self.client.get(reverse(
+            'posts:group_trending', kwargs={'slug': self.group.slug}))
+        self.assertEqual(
+            list(response.context['page_obj']), [self.quiet_post])
+
+    def test_bump_skipped_while_score_locked(self):
+        """Пока рейтинг поста занят другим процессом, событие пропускается."""
+        key = trending.SCORE_KEY.format(self.hot_post.pk)
+        with cache_lock(key) as acquired:
+            self.assertTrue(acquired)
+            trending.register_comment(self.hot_post)
+        self.assertIsNone(cache.get(key))
+        self.assertEqual(trending.top_post_ids(), [])
+        trending.register_comment(self.hot_post)
+        self.assertEqual(trending.top_post_ids(), [self.hot_post.pk])
+
+    @override_settings(TRENDING_SIZE=1)
+    def test_top_is_bounded(self):
+        """В top-K хранится не больше TRENDING_SIZE постов."""
+        trending.register_view(self.quiet_post)
+        trending.register_comment(self.hot_post)
+        self.assertEqual(trending.top_post_ids(), [self.hot_post.id])
@@ -0,0 +1,120 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.models import Task
+from core.tasks import run_pending
+from posts import follow_graph
+from posts.models import Comment, Follow, Post, User
+from posts.tasks import schedule_user_deletion
+
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (b'\x47\x49\x46\x38\x39\x61\x02\x00'
+             b'\x01\x00\x80\x00\x00\x00\x00\x00'
+             b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+             b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+             b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+             b'\x0A\x00\x3B')
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT, USER_PURGE_BATCH_SIZE=2, USER_PURGE_PAUSE=0
+)
+class UserDeletionTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='leaving')
+        self.reader = User.objects.create_user(username='reader')
+        self.posts = [
+            Post.objects.create(text=f'Пост {i}', author=self.user)
+            for i in range(5)
+        ]
+        self.posts[0].image = SimpleUploadedFile(
+            'image.gif', SMALL_GIF, content_type='image/gif')
+        self.posts[0].save()
+        self.image_path = self.posts[0].image.path
+        self.reader_post = Post.objects.create(
+            text='Пост читателя', author=self.reader)
+        Comment.objects.create(
+            post=self.reader_post, author=self.user, text='Комментарий')
+        Follow.objects.create(user=self.reader, author=self.user)
+        self.client = Client()
+
+    def test_soft_deleted_content_hidden_immediately(self):
+        """Контент мягко удалённого пользователя сразу скрыт."""
+        schedule_user_deletion(self.user)
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(
+            list(response.context['page_obj']), [self.reader_post])
+        response = self.client.get(reverse(
+            'posts:post_detail', kwargs={'post_id': self.reader_post.id}))
+        self.assertEqual(len(response.context['comments']), 0)
+        for url in (
+            reverse('posts:profile', kwargs={'username': 'leaving'}),
+            reverse('posts:post_detail',
+                    kwargs={'post_id': self.posts[1].id}),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_purge_runs_in_batches(self):
+        """Удаление идёт пачками и убирает файлы картинок."""
+        self.assertIn(self.user.id, follow_graph.get_followees(self.reader.id))
+        schedule_user_deletion(self.user)
+        schedule_user_deletion(self.user)
+        self.assertEqual(Task.objects.filter(status=Task.QUEUED).count(), 1)
+        with mock.patch('posts.images.transaction.on_commit',
+                        side_effect=lambda callback: callback()):
+            executed = run_pending()
+        # 3 пачки постов, комментарий, подписка и удаление пользователя.
+        self.assertEqual(executed, 6)
+        self.assertFalse(User.objects.filter(id=self.user.id).exists())
+        self.assertFalse(Post.objects.filter(author=self.user).exists())
+        self.assertFalse(Comment.objects.exists())
+        self.assertFalse(Follow.objects.exists())
+        self.assertFalse(os.path.exists(self.image_path))
+        self.assertTrue(Post.objects.filter(id=self.reader_post.id).exists())
+        self.assertNotIn(
+            self.user.id, follow_graph.get_followees(self.reader.id))
+
+    def test_deleted_again_after_reactivation(self):
+        """Повторное удаление восстановленного пользователя не теряется."""
+        schedule_user_deletion(self.user)
+        self.user.is_active = True
+        self.user.save()
+        self.assertEqual(run_pending(), 1)
+        schedule_user_deletion(self.user)
+        with mock.patch('posts.images.transaction.on_commit',
+                        side_effect=lambda callback: callback()):
+            run_pending()
+        self.assertFalse(User.objects.filter(id=self.user.id).exists())
+
+    def test_admin_delete_runs_in_background(self):
+        """Удаление из админки только ставит задачу в очередь."""
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        self.client.force_login(admin)
+        url = reverse('admin:auth_user_delete', args=(self.user.id,))
+        response = self.client.post(url, {'post': 'yes'})
+        self.assertEqual(response.status_code, 302)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        self.assertEqual(Post.objects.filter(author=self.user).count(), 5)
+        self.assertTrue(Task.objects.filter(
+            name='posts.tasks.purge_user', status=Task.QUEUED).exists())
+        response = self.client.get(reverse('admin:auth_user_changelist'))
+        actions = response.context['action_form'].fields['action'].choices
+        self.assertNotIn('delete_selected', dict(actions))
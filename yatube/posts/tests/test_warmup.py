@@ -0,0 +1,53 @@
+import importlib
+import os
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Follow, Group, Post, User
+from yatube import wsgi
+
+
+@override_settings(SITE_URL='http://testserver')
+class WarmupCommandTests(TransactionTestCase):
+    # Страницы прогреваются в отдельных потоках со своими соединениями,
+    # поэтому данные теста должны быть закоммичены.
+
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user(username='auth')
+        reader = User.objects.create_user(username='reader')
+        group = Group.objects.create(
+            title='Тестовая группа', slug='test', description='Описание')
+        Post.objects.create(text='Тестовый пост', author=user, group=group)
+        Follow.objects.create(user=reader, author=user)
+
+    def test_popular_pages_warmed(self):
+        """После прогрева главная отдаётся из кеша без запросов к базе."""
+        out, err = StringIO(), StringIO()
+        call_command('warmup', verbosity=2, stdout=out, stderr=err)
+        output = out.getvalue()
+        self.assertIn('LocMemCache', err.getvalue())
+        for path in (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=['test']),
+            reverse('posts:profile', args=['auth']),
+        ):
+            with self.subTest(path=path):
+                self.assertRegex(output, rf'200 +[\d.]+ мс  {path}\n')
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Тестовый пост')
+
+    def test_wsgi_warmup_failure_does_not_block_startup(self):
+        """Ошибка прогрева при загрузке WSGI только пишется в лог."""
+        with mock.patch.dict(os.environ, {'YATUBE_WARMUP': '1'}), \
+                mock.patch('django.core.management.call_command',
+                           side_effect=RuntimeError), \
+                self.assertLogs('yatube.wsgi', 'ERROR'):
+            importlib.reload(wsgi)
+        self.assertTrue(callable(wsgi.application))
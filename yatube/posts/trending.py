@@ -0,0 +1,88 @@
+import math
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core.locks import cache_lock
+
+
+COMMENT_WEIGHT = 1.0
+VIEW_WEIGHT = 0.1
+EPOCH = 1672531200  # 2023-01-01 UTC
+
+SCORE_KEY = 'trending:score:{}'
+TOP_KEY = 'trending:top:{}'
+GLOBAL_SCOPE = 'global'
+
+
+def group_scope(group_id):
+    return f'group:{group_id}'
+
+
+def _decay_rate():
+    return math.log(2) / settings.TRENDING_HALF_LIFE
+
+
+def _logaddexp(a, b):
+    if a is None:
+        return b
+    high, low = max(a, b), min(a, b)
+    return high + math.log1p(math.exp(low - high))
+
+
+def _update_top(scope, post_id, score):
+    """Обновляет ограниченный top-K области, отсортированный по убыванию.
+
+    Записи хранятся как (-score, post_id), чтобы работал bisect."""
+    key = TOP_KEY.format(scope)
+    with cache_lock(key) as acquired:
+        if not acquired:
+            return
+        entries = [
+            entry for entry in cache.get(key, []) if entry[1] != post_id
+        ]
+        entry = (-score, post_id)
+        size = settings.TRENDING_SIZE
+        if len(entries) >= size and entry >= entries[-1]:
+            return
+        entries.insert(bisect_left(entries, entry), entry)
+        cache.set(key, entries[:size], None)
+
+
+def bump(post, weight):
+    """
+    Добавляет посту событие с весом weight.
+
+    Рейтинг хранится в логарифмической шкале относительно EPOCH:
+    log(sum(w * 2 ** ((t - EPOCH) / half_life))). Порядок постов по нему
+    совпадает с порядком по затухающему рейтингу на текущий момент,
+    поэтому уже сохранённые значения пересчитывать не нужно.
+
+    Рейтинг и списки top-K меняются под блокировками в общем кеше.
+    Если блокировку не удалось занять, событие пропускается: популярное —
+    приблизительная оценка, и ждать ради неё запрос не должен.
+    """
+    key = SCORE_KEY.format(post.pk)
+    event = math.log(weight) + (time.time() - EPOCH) * _decay_rate()
+    with cache_lock(key) as acquired:
+        if not acquired:
+            return
+        score = _logaddexp(cache.get(key), event)
+        cache.set(key, score, settings.TRENDING_HALF_LIFE * 10)
+    _update_top(GLOBAL_SCOPE, post.pk, score)
+    if post.group_id:
+        _update_top(group_scope(post.group_id), post.pk, score)
+
+
+def register_comment(post):
+    bump(post, COMMENT_WEIGHT)
+
+
+def register_view(post):
+    bump(post, VIEW_WEIGHT)
+
+
+def top_post_ids(scope=GLOBAL_SCOPE):
+    return [post_id for _, post_id in cache.get(TOP_KEY.format(scope), [])]
@@ -7,16 +7,29 @@ app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('trending/', views.trending, name='trending'),
+    path('group/', views.group_index, name='group_index'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
+    path(
+        'group/<slug:slug>/trending/',
+        views.trending,
+        name='group_trending'
+    ),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
+    path(
+        'posts/<int:post_id>/history/',
+        views.post_history,
+        name='post_history'
+    ),
     path('create/', views.post_сreate, name='post_create'),
     path(
         'posts/<int:post_id>/comment/',
         views.add_comment,
         name='add_comment'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('follow/bulk/', views.bulk_follow, name='bulk_follow'),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
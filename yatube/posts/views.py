@@ -1,16 +1,31 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.core.paginator import Paginator
-from .models import Post, Group, User, Comment, Follow
-from .forms import PostForm, CommentForm
+from .models import Post, Group, User, FollowSuggestion, ArchivedPost
+from .forms import PostForm, CommentForm, BulkFollowForm
+from . import archive, follow_graph, revisions, trending as trending_posts
+from .tasks import generate_thumbnails
+from notifications.inbox import notify_comment
+from notifications.tasks import notify_followers
 from django.contrib.auth.decorators import login_required
-from yatube.settings import POST_AMOUNT, CACHE_PAGE_TIME
+from django.db import transaction
+from django.http import Http404, JsonResponse
+from django.views.decorators.http import require_POST
+from yatube.settings import POST_AMOUNT, GROUP_AMOUNT, CACHE_PAGE_TIME
 from django.views.decorators.cache import cache_page
+from django.views.decorators.vary import vary_on_cookie
+from core.middleware import compress_page
+from core.pagination import CachedCountPaginator, keyset_page
+
+
+FOLLOW_INDEX_MAX_IN_LIST = 500
 
 
 @cache_page(timeout=CACHE_PAGE_TIME, key_prefix='index_page')
+@vary_on_cookie
+@compress_page
 def index(request):
-    posts = Post.objects.all()
-    paginator = Paginator(posts, POST_AMOUNT)
+    posts = Post.objects.filter(author__is_active=True)
+    paginator = CachedCountPaginator(posts, POST_AMOUNT)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     context = {
@@ -19,10 +34,27 @@ def index(request):
     return render(request, 'posts/index.html', context)
 
 
+@cache_page(timeout=CACHE_PAGE_TIME, key_prefix='group_index')
+@vary_on_cookie
+@compress_page
+def group_index(request):
+    groups, next_cursor = keyset_page(
+        Group.objects.only('title', 'slug', 'posts_count', 'last_activity'),
+        'slug',
+        request.GET.get('after'),
+        GROUP_AMOUNT,
+    )
+    context = {
+        'groups': groups,
+        'next_cursor': next_cursor,
+    }
+    return render(request, 'posts/group_index.html', context)
+
+
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = Post.objects.filter(group=group).all()
-    paginator = Paginator(posts, POST_AMOUNT)
+    posts = Post.objects.filter(group=group, author__is_active=True)
+    paginator = CachedCountPaginator(posts, POST_AMOUNT)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     context = {
@@ -33,21 +65,52 @@ def group_posts(request, slug):
     return render(request, template, context)
 
 
+def trending(request, slug=None):
+    group = None
+    scope = trending_posts.GLOBAL_SCOPE
+    if slug is not None:
+        group = get_object_or_404(Group, slug=slug)
+        scope = trending_posts.group_scope(group.id)
+    paginator = Paginator(trending_posts.top_post_ids(scope), POST_AMOUNT)
+    page_number = request.GET.get('page')
+    page_obj = paginator.get_page(page_number)
+    posts = Post.objects.filter(author__is_active=True).in_bulk(
+        page_obj.object_list
+    )
+    page_obj.object_list = [
+        posts[post_id] for post_id in page_obj.object_list
+        if post_id in posts
+        and (group is None or posts[post_id].group_id == group.id)
+    ]
+    context = {
+        'group': group,
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/trending.html', context)
+
+
 def profile(request, username):
     user = request.user
-    username = get_object_or_404(User, username=username)
-    posts = Post.objects.filter(author=username).all()
-    count = posts.count()
-    paginator = Paginator(posts, POST_AMOUNT)
+    username = get_object_or_404(User, username=username, is_active=True)
+    posts = archive.PostHistory(
+        Post.objects.filter(author=username),
+        ArchivedPost.objects.filter(author=username),
+    )
+    paginator = CachedCountPaginator(posts, POST_AMOUNT)
+    count = paginator.count
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
-    following = user.is_authenticated and Follow.objects.filter(
-        author=username, user=user
-    ).exists()
+    following = user.is_authenticated and follow_graph.is_following(
+        user.id, username.id
+    )
+    suggestion = user.is_authenticated and FollowSuggestion.objects.filter(
+        user=user
+    ).first()
     context = {
         'user': user,
         'username': username,
         'following': following,
+        'suggested_authors': suggestion.get_authors() if suggestion else [],
         'page_obj': page_obj,
         'count': count
     }
@@ -55,16 +118,25 @@ def profile(request, username):
 
 
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
-    count = Post.objects.filter(author=post.author).count()
-    comments = Comment.objects.filter(post_id=post_id)
+    post = archive.get_post(post_id, author__is_active=True)
+    if post is None:
+        raise Http404
+    is_archived = archive.is_archived(post)
+    if not is_archived:
+        trending_posts.register_view(post)
+    count = archive.PostHistory(
+        Post.objects.filter(author=post.author),
+        ArchivedPost.objects.filter(author=post.author),
+    ).count()
+    comments = post.comments.filter(author__is_active=True)
     form = CommentForm()
     context = {
         'comments': comments,
         'form': form,
         'post': post,
         'count': count,
-        'is_edit': post.author == request.user,
+        'is_archived': is_archived,
+        'is_edit': post.author == request.user and not is_archived,
     }
     return render(request, 'posts/post_detail.html', context)
 
@@ -76,6 +148,9 @@ def post_сreate(request):
         post = form.save(False)
         post.author = request.user
         post.save()
+        if post.image:
+            generate_thumbnails.delay(post.id)
+        notify_followers.delay(post.id)
         return redirect('posts:profile', username=request.user.username)
     form = PostForm()
     context = {
@@ -90,13 +165,18 @@ def post_edit(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     if post.author != request.user:
         return redirect('posts:post_detail', post_id=post_id)
+    old_text = post.text
     form = PostForm(
         request.POST or None,
         instance=post,
         files=request.FILES or None
     )
     if form.is_valid():
-        form.save()
+        with transaction.atomic():
+            form.save()
+            revisions.record_edit(post, old_text, post.text)
+        if 'image' in form.changed_data and post.image:
+            generate_thumbnails.delay(post.id)
         return redirect('posts:post_detail', post_id=post_id)
     form = PostForm(instance=post)
     context = {
@@ -107,6 +187,26 @@ def post_edit(request, post_id):
     return render(request, 'posts/post_create.html', context)
 
 
+def post_history(request, post_id):
+    post = archive.get_post(post_id, author__is_active=True)
+    if post is None:
+        raise Http404
+    post_revisions = list(post.revisions.defer('data'))
+    number = request.GET.get('rev')
+    text = None
+    if number and number.isdigit():
+        if int(number) not in {r.number for r in post_revisions}:
+            raise Http404
+        text = revisions.revision_text(post, int(number))
+    context = {
+        'post': post,
+        'revisions': post_revisions,
+        'number': number,
+        'text': text,
+    }
+    return render(request, 'posts/post_history.html', context)
+
+
 @login_required
 def add_comment(request, post_id):
     post = get_object_or_404(Post, id=post_id)
@@ -116,14 +216,22 @@ def add_comment(request, post_id):
         comment.author = request.user
         comment.post = post
         comment.save()
+        trending_posts.register_comment(post)
+        notify_comment(comment)
     return redirect('posts:post_detail', post_id=post_id)
 
 
 @login_required
 def follow_index(request):
-    authors = request.user.follower.values_list('author', flat=True)
-    posts = Post.objects.filter(author__id__in=authors)
-    paginator = Paginator(posts, POST_AMOUNT)
+    authors = follow_graph.get_followees(request.user.id)
+    if len(authors) > FOLLOW_INDEX_MAX_IN_LIST:
+        authors = request.user.follower.values_list('author', flat=True)
+    else:
+        authors = list(authors)
+    posts = Post.objects.filter(
+        author__id__in=authors, author__is_active=True
+    )
+    paginator = CachedCountPaginator(posts, POST_AMOUNT)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     context = {
@@ -135,20 +243,34 @@ def follow_index(request):
 @login_required
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
-    user = request.user
-    if Follow.objects.filter(user=user, author=author).exists():
-        return redirect('posts:profile', username=username)
-    if author != user:
-        Follow.objects.create(user=user, author=author)
-        return redirect(
-            'posts:profile',
-            username=username
-        )
+    follow_graph.follow(request.user.id, [author.id])
     return redirect('posts:profile', username=username)
 
 
 @login_required
 def profile_unfollow(request, username):
-    user = request.user
-    Follow.objects.get(user=user, author__username=username).delete()
+    author = get_object_or_404(User, username=username)
+    follow_graph.unfollow(request.user.id, [author.id])
     return redirect('posts:profile', username=username)
+
+
+@login_required
+@require_POST
+def bulk_follow(request):
+    form = BulkFollowForm(request.POST)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+    usernames = form.cleaned_data['usernames']
+    with transaction.atomic():
+        authors = dict(User.objects.filter(
+            username__in=usernames
+        ).values_list('username', 'id'))
+        if form.cleaned_data['action'] == BulkFollowForm.FOLLOW:
+            follow_graph.follow(request.user.id, authors.values())
+        else:
+            follow_graph.unfollow(request.user.id, authors.values())
+    return JsonResponse({
+        'action': form.cleaned_data['action'],
+        'authors': sorted(authors),
+        'unknown': sorted(set(usernames) - set(authors)),
+    })
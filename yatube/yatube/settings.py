@@ -10,12 +10,24 @@ DEBUG = False
 ALLOWED_HOSTS = ['51.250.74.245', '127.0.0.1', 'localhost']
 
 POST_AMOUNT = 10
+GROUP_AMOUNT = 100
+POST_REVISION_SNAPSHOT_EVERY = 10
+FOLLOW_SUGGESTIONS_AMOUNT = 10
+TRENDING_SIZE = 100
+TRENDING_HALF_LIFE = 60 * 60 * 6
+ARCHIVE_AFTER_DAYS = 365
+ARCHIVE_BATCH_SIZE = 500
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+EMAIL_DIGEST_PERIOD = 60 * 60
+EMAIL_BATCH_SIZE = 100
+SITE_URL = 'http://51.250.74.245'
+NOTIFICATIONS_AMOUNT = 20
+NOTIFICATIONS_CACHE_TIME = 60 * 60
 
 INSTALLED_APPS = [
     'django.contrib.admin',
@@ -28,16 +40,19 @@ INSTALLED_APPS = [
     'about.apps.AboutConfig',
     'core.apps.CoreConfig',
     'posts.apps.PostsConfig',
+    'notifications.apps.NotificationsConfig',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.RateLimitMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
@@ -55,6 +70,7 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
+                'notifications.context_processors.unread_notifications',
             ],
         },
     },
@@ -105,6 +121,13 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+MEDIA_CACHE_MAX_AGE = 60 * 60 * 24 * 365
+# None, 'x-sendfile' (Apache, lighttpd) или 'x-accel-redirect' (nginx).
+MEDIA_SENDFILE = None
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+
+THUMBNAIL_WIDTHS = (320, 480, 640, 960)
+THUMBNAIL_SIZES = '(max-width: 992px) 100vw, 960px'
 
 CACHES = {
     'default': {
@@ -112,3 +135,35 @@ CACHES = {
     }
 }
 CACHE_PAGE_TIME = 20
+PAGINATOR_COUNT_CACHE_TIME = 60
+HEALTH_CHECK_TIMEOUT = 2
+HEALTH_CACHE_TIME = 5
+WARMUP_PAGES = 3
+WARMUP_GROUPS = 10
+WARMUP_PROFILES = 10
+WARMUP_THUMBNAILS = 100
+WARMUP_WORKERS = 4
+
+SESSION_ENGINE = 'core.sessions'
+SESSION_WRITE_BEHIND_INTERVAL = 300
+USER_CACHE_TIME = 60 * 15
+FOLLOW_GRAPH_CACHE_TIME = 60 * 60
+BULK_FOLLOW_LIMIT = 200
+USER_PURGE_BATCH_SIZE = 500
+USER_PURGE_PAUSE = 1
+BULK_JOB_BATCH_SIZE = 500
+BULK_JOB_PAUSE = 1
+
+TASKS_WORKERS = 2
+TASKS_POLL_INTERVAL = 1
+TASKS_MAX_ATTEMPTS = 5
+TASKS_RETRY_DELAY = 10
+TASKS_MAX_RETRY_DELAY = 60 * 60
+TASKS_STALE_TIMEOUT = 60 * 60
+TASKS_MAINTENANCE_INTERVAL = 60
+TASKS_DONE_RETENTION = 60 * 60 * 24 * 7
+
+RATELIMITS = {
+    'posts:post_create': {'user': '10/m', 'ip': '30/m'},
+    'posts:add_comment': {'user': '30/m', 'ip': '90/m'},
+}
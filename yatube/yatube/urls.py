@@ -1,8 +1,11 @@
+from urllib.parse import urlsplit
+
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
 
+from core import views as core_views
+
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -10,12 +13,20 @@ urlpatterns = [
     path('auth/', include('users.urls', namespace='users')),
     path('auth/', include('django.contrib.auth.urls')),
     path('about/', include('about.urls', namespace='about')),
+    path(
+        'notifications/',
+        include('notifications.urls', namespace='notifications')
+    ),
+    path('health/live', core_views.health_live, name='health_live'),
+    path('health/ready', core_views.health_ready, name='health_ready'),
 ]
 
 handler404 = 'core.views.page_not_found'
 handler403 = 'core.views.csrf_failure'
 
-if settings.DEBUG:
-    urlpatterns += static(
-        settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
-    )
+if not urlsplit(settings.MEDIA_URL).netloc:
+    urlpatterns.append(path(
+        settings.MEDIA_URL.lstrip('/') + '<path:path>',
+        core_views.serve_media,
+        name='media',
+    ))
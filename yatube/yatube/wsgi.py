@@ -1,3 +1,4 @@
+import logging
 import os
 
 from django.core.wsgi import get_wsgi_application
@@ -5,3 +6,13 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+# Прогрев воркера до первого запроса: YATUBE_WARMUP=1 в окружении.
+# Ошибка прогрева не должна мешать воркеру запуститься.
+if os.environ.get('YATUBE_WARMUP'):
+    from django.core.management import call_command
+
+    try:
+        call_command('warmup', verbosity=0)
+    except Exception:
+        logging.getLogger(__name__).exception('Прогрев воркера не удался')